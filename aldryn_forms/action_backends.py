@@ -1,12 +1,38 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.utils import translation
 from django.utils.translation import gettext_lazy as _
 
+from asgiref.sync import sync_to_async
+
+from . import api
 from .action_backends_base import BaseAction
+from .constants import (
+    API_BATCH_SIZE,
+    API_BATCH_WAIT,
+    API_CONCURRENCY,
+    API_ENDPOINT,
+    API_HEADERS,
+    API_TIMEOUT,
+    COMPOSITE_ACTION_BACKENDS,
+    COMPOSITE_ACTION_TIMEOUT,
+)
+from .utils import get_action_backends, run_in_thread
 
 logger = logging.getLogger(__name__)
 
+# (backend class, endpoint) -> micro batcher shared by its instances
+_batchers = {}
+_batchers_lock = threading.Lock()
+
 try:
     from custom.aldryn_forms.api import APIMixin
 except:
@@ -24,6 +50,12 @@ class DefaultAction(BaseAction):
         form.save()
         cmsplugin.send_success_message(instance, request)
 
+    async def aform_valid(self, cmsplugin, instance, request, form):
+        recipients = await run_in_thread(cmsplugin.send_notifications)(instance, form, request)
+        form.instance.set_recipients(recipients)
+        await sync_to_async(form.save)()
+        cmsplugin.send_success_message(instance, request)
+
 
 class EmailAction(BaseAction):
     verbose_name = _('Email only')
@@ -32,42 +64,289 @@ class EmailAction(BaseAction):
         recipients = cmsplugin.send_notifications(instance, form, request)
         logger.info('Sent email notifications to {} recipients.'.format(len(recipients)))
 
+    async def aform_valid(self, cmsplugin, instance, request, form):
+        recipients = await run_in_thread(cmsplugin.send_notifications)(instance, form, request)
+        logger.info('Sent email notifications to {} recipients.'.format(len(recipients)))
+
 
 class NoAction(BaseAction):
     verbose_name = _('None')
+    persist_uploads = False
 
     def form_valid(self, cmsplugin, instance, request, form):
         form_id = form.form_plugin.id
         logger.info('Not persisting data for "{}" since action_backend is set to "none"'.format(form_id))
 
 
-class EmailAPIAction(APIMixin, BaseAction):
+class BaseAPIAction(APIMixin, BaseAction):
+    """
+    Base for backends handing submissions to a remote API.
+
+    With an endpoint the submission is posted as json over a pooled
+    keep-alive connection, at most `concurrency` calls at a time.
+    With a batch_size above 1, submissions arriving within
+    batch_wait milliseconds are posted together as a json list.
+    Without an endpoint the custom APIMixin is used.
+    """
+    endpoint = API_ENDPOINT
+    headers = API_HEADERS
+    timeout = API_TIMEOUT
+    concurrency = API_CONCURRENCY
+    batch_size = API_BATCH_SIZE
+    batch_wait = API_BATCH_WAIT
+
+    def get_payload(self, cmsplugin, instance, request, form):
+        return {
+            'form': instance.name,
+            'form_id': instance.pk,
+            'language': getattr(request, 'LANGUAGE_CODE', None),
+            'data': form.get_serialized_field_dict(),
+        }
+
+    def post(self, payloads):
+        data = payloads if self.batch_size > 1 else payloads[0]
+        return api.post(
+            self.endpoint,
+            data,
+            headers=self.headers,
+            timeout=self.timeout,
+            concurrency=self.concurrency,
+        )
+
+    def get_batcher(self):
+        key = (self.__class__, self.endpoint)
+
+        with _batchers_lock:
+            if key not in _batchers:
+                _batchers[key] = api.MicroBatcher(
+                    self.post,
+                    size=self.batch_size,
+                    wait=self.batch_wait / 1000.0,
+                )
+            return _batchers[key]
+
+    def call_api(self, cmsplugin, instance, request, form):
+        if not self.endpoint:
+            return APIMixin.form_valid(self, cmsplugin, instance, request, form)
+
+        payload = self.get_payload(cmsplugin, instance, request, form)
+
+        if self.batch_size > 1:
+            future = self.get_batcher().submit(payload)
+            return future.result(self.timeout + self.batch_wait / 1000.0)
+        return self.post([payload])
+
+    def send_to_api(self, cmsplugin, instance, request, form):
+        """
+        Hands the submission to the API, returns False if that failed.
+        """
+        try:
+            self.call_api(cmsplugin, instance, request, form)
+        except api.APIError as e:
+            logger.warning(
+                'API call for form %s failed (status %s, retryable %s): %s',
+                instance.pk, e.status, e.retryable, e,
+            )
+            return False
+        except Exception:
+            logger.exception('API call for form %s failed.', instance.pk)
+            return False
+        return True
+
+    def form_invalid(self, cmsplugin, instance, request, form):
+        pass
+
+
+class EmailAPIAction(BaseAPIAction):
     verbose_name = _('Email and API')
 
     def form_valid(self, cmsplugin, instance, request, form):
         recipients = cmsplugin.send_notifications(instance, form, request)
-        try:
-            super().form_valid(cmsplugin, instance, request, form)
-        except:
+        if not self.send_to_api(cmsplugin, instance, request, form):
             form.instance.set_recipients(recipients)
             form.save()
         cmsplugin.send_success_message(instance, request)
 
-    def form_invalid(self, cmsplugin, instance, request, form):
-        pass
+    async def aform_valid(self, cmsplugin, instance, request, form):
+        # the emails and the api call don't depend on each other.
+        recipients, sent = await asyncio.gather(
+            run_in_thread(cmsplugin.send_notifications)(instance, form, request),
+            run_in_thread(self.send_to_api)(cmsplugin, instance, request, form),
+        )
+        if not sent:
+            form.instance.set_recipients(recipients)
+            await sync_to_async(form.save)()
+        cmsplugin.send_success_message(instance, request)
 
 
-class APIAction(APIMixin, BaseAction):
+class APIAction(BaseAPIAction):
     verbose_name = _('API Only')
 
     def form_valid(self, cmsplugin, instance, request, form):
-        try:
-            super().form_valid(cmsplugin, instance, request, form)
-        except:
+        if not self.send_to_api(cmsplugin, instance, request, form):
             recipients = cmsplugin.send_notifications(instance, form, request)
             form.instance.set_recipients(recipients)
             form.save()
         cmsplugin.send_success_message(instance, request)
 
-    def form_invalid(self, cmsplugin, instance, request, form):
+    async def aform_valid(self, cmsplugin, instance, request, form):
+        sent = await run_in_thread(self.send_to_api)(cmsplugin, instance, request, form)
+        if not sent:
+            recipients = await run_in_thread(cmsplugin.send_notifications)(instance, form, request)
+            form.instance.set_recipients(recipients)
+            await sync_to_async(form.save)()
+        cmsplugin.send_success_message(instance, request)
+
+
+class ActionResult(object):
+
+    def __init__(self, backend, value=None, error=None):
+        self.backend = backend
+        self.value = value
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class QuietPlugin(object):
+    """
+    Hands the form plugin to a backend run by CompositeAction,
+    keeping it from sending its own success message.
+    """
+
+    def __init__(self, cmsplugin):
+        self._cmsplugin = cmsplugin
+
+    def __getattr__(self, name):
+        return getattr(self._cmsplugin, name)
+
+    def send_success_message(self, instance, request):
         pass
+
+
+class CompositeAction(BaseAction):
+    """
+    Runs several action backends for a submission.
+
+    Backends which save the form or send notifications run one after
+    another in the request, since they share the form. Backends marked
+    as concurrent, like outbound api calls, run on threads of their own
+    meanwhile, outside of the request's transaction.
+    A failing backend is logged and doesn't affect the others.
+    The concurrent backends get `timeout` seconds in total, one which
+    takes longer is reported as timed out but may still finish later,
+    after the response was sent.
+    The success message is sent once, after all of them ran.
+    """
+    verbose_name = _('Combined actions')
+    # keys of the registered backends to run
+    backends = COMPOSITE_ACTION_BACKENDS
+    timeout = COMPOSITE_ACTION_TIMEOUT
+
+    def get_backends(self):
+        registry = get_action_backends()
+        backends = [(key, registry[key]) for key in self.backends]
+
+        if any(issubclass(klass, CompositeAction) for key, klass in backends):
+            raise ImproperlyConfigured(
+                'Invalid settings.ALDRYN_FORMS_COMPOSITE_ACTION_BACKENDS. '
+                'A combined action can\'t run itself.'
+            )
+        return [(key, klass()) for key, klass in backends]
+
+    def run_backend(self, language, backend, cmsplugin, instance, request, form):
+        try:
+            with translation.override(language):
+                return backend.form_valid(cmsplugin, instance, request, form)
+        finally:
+            connections.close_all()
+
+    def call_backend(self, key, backend, cmsplugin, instance, request, form):
+        try:
+            return ActionResult(key, value=backend.form_valid(cmsplugin, instance, request, form))
+        except Exception as e:
+            logger.exception('Action backend "%s" failed.', key)
+            return ActionResult(key, error=e)
+
+    def get_result(self, key, future):
+        if not future.done():
+            future.cancel()
+            logger.error('Action backend "%s" timed out after %s seconds.', key, self.timeout)
+            return ActionResult(key, error=FutureTimeoutError())
+
+        try:
+            return ActionResult(key, value=future.result())
+        except Exception as e:
+            logger.exception('Action backend "%s" failed.', key)
+            return ActionResult(key, error=e)
+
+    def form_valid(self, cmsplugin, instance, request, form):
+        quiet_plugin = QuietPlugin(cmsplugin)
+        backends = list(enumerate(self.get_backends()))
+        deadline = time.monotonic() + self.timeout
+        language = translation.get_language()
+        results = [None] * len(backends)
+        futures = []
+        # a pool per submission, so backends which hang past the timeout
+        # keep their threads without holding up other submissions.
+        executor = ThreadPoolExecutor(
+            max_workers=max(len(backends), 1),
+            thread_name_prefix='aldryn-forms-actions',
+        )
+
+        try:
+            for index, (key, backend) in backends:
+                if backend.concurrent:
+                    future = executor.submit(
+                        self.run_backend, language, backend, quiet_plugin, instance, request, form,
+                    )
+                    futures.append((index, key, future))
+
+            for index, (key, backend) in backends:
+                if not backend.concurrent:
+                    results[index] = self.call_backend(key, backend, quiet_plugin, instance, request, form)
+
+            # a single deadline for all concurrent backends.
+            wait([future for index, key, future in futures], timeout=max(deadline - time.monotonic(), 0))
+        finally:
+            executor.shutdown(wait=False)
+
+        for index, key, future in futures:
+            results[index] = self.get_result(key, future)
+        cmsplugin.send_success_message(instance, request)
+        return results
+
+    async def arun_backend(self, key, backend, cmsplugin, instance, request, form, timeout=None):
+        try:
+            value = await asyncio.wait_for(
+                backend.aform_valid(cmsplugin, instance, request, form),
+                timeout,
+            )
+        except asyncio.TimeoutError as e:
+            logger.error('Action backend "%s" timed out after %s seconds.', key, timeout)
+            return ActionResult(key, error=e)
+        except Exception as e:
+            logger.exception('Action backend "%s" failed.', key)
+            return ActionResult(key, error=e)
+        return ActionResult(key, value=value)
+
+    async def aform_valid(self, cmsplugin, instance, request, form):
+        quiet_plugin = QuietPlugin(cmsplugin)
+        backends = list(enumerate(self.get_backends()))
+        results = [None] * len(backends)
+        concurrent = [(index, key, backend) for index, (key, backend) in backends if backend.concurrent]
+        running = asyncio.gather(*[
+            self.arun_backend(key, backend, quiet_plugin, instance, request, form, self.timeout)
+            for index, key, backend in concurrent
+        ])
+
+        for index, (key, backend) in backends:
+            if not backend.concurrent:
+                results[index] = await self.arun_backend(key, backend, quiet_plugin, instance, request, form)
+
+        for (index, key, backend), result in zip(concurrent, await running):
+            results[index] = result
+        cmsplugin.send_success_message(instance, request)
+        return results
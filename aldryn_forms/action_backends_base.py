@@ -2,9 +2,15 @@
 import abc
 
 import six
+from asgiref.sync import sync_to_async
 
 
 class BaseAction(six.with_metaclass(abc.ABCMeta)):
+    # whether uploaded files are stored in filer for this backend
+    persist_uploads = True
+    # whether CompositeAction may run this backend on a thread of its own,
+    # only for backends which neither save the form nor send notifications.
+    concurrent = False
 
     @abc.abstractproperty
     def verbose_name(self):
@@ -13,3 +19,10 @@ class BaseAction(six.with_metaclass(abc.ABCMeta)):
     @abc.abstractmethod
     def form_valid(self, cmsplugin, instance, request, form):
         pass  # pragma: no cover
+
+    async def aform_valid(self, cmsplugin, instance, request, form):
+        """
+        Async variant of form_valid, runs form_valid on the sync thread
+        unless overridden.
+        """
+        return await sync_to_async(self.form_valid)(cmsplugin, instance, request, form)
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 from django.contrib import admin
 
-from ..models import FormSubmission
+from ..models import FormSubmission, SubmissionTask
 from .base import BaseFormSubmissionAdmin
 from .views import FormExportWizardView
 
@@ -14,3 +14,16 @@ class FormSubmissionAdmin(BaseFormSubmissionAdmin):
 
 
 admin.site.register(FormSubmission, FormSubmissionAdmin)
+
+
+class SubmissionTaskAdmin(admin.ModelAdmin):
+    list_display = ['pk', 'form_name', 'status', 'attempts', 'created_at', 'run_after']
+    list_filter = ['status']
+    readonly_fields = ['form_plugin_id', 'form_name', 'payload', 'attempts', 'last_error', 'created_at']
+    fields = ['form_plugin_id', 'form_name', 'status', 'run_after', 'attempts', 'last_error', 'payload', 'created_at']
+
+    def has_add_permission(self, request):
+        return False
+
+
+admin.site.register(SubmissionTask, SubmissionTaskAdmin)
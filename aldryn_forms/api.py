@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from concurrent.futures import Future
+
+from .constants import API_TIMEOUT
+from .http import PooledHTTPClient
+
+
+client = PooledHTTPClient(timeout=API_TIMEOUT)
+
+# endpoint -> semaphore limiting the concurrent calls to it
+_semaphores = {}
+_semaphores_lock = threading.Lock()
+
+
+class APIError(Exception):
+
+    def __init__(self, message, status=None, retryable=False):
+        super(APIError, self).__init__(message)
+        self.status = status
+        self.retryable = retryable
+
+
+def get_semaphore(endpoint, limit):
+    with _semaphores_lock:
+        if endpoint not in _semaphores:
+            _semaphores[endpoint] = threading.BoundedSemaphore(limit)
+        return _semaphores[endpoint]
+
+
+def post(endpoint, data, headers=None, timeout=None, concurrency=None):
+    """
+    Posts data as json and returns the decoded response,
+    raises APIError if that failed.
+    """
+    semaphore = get_semaphore(endpoint, concurrency) if concurrency else None
+
+    try:
+        if semaphore is not None:
+            semaphore.acquire()
+        try:
+            response = client.post_json(endpoint, data, headers=headers, timeout=timeout)
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+    except OSError as e:
+        # timeouts, refused and dropped connections
+        raise APIError(str(e), retryable=True)
+
+    if not response.ok:
+        raise APIError(
+            'The api answered with status {}.'.format(response.status),
+            status=response.status,
+            retryable=response.status == 429 or response.status >= 500,
+        )
+
+    if not response.content:
+        return None
+
+    try:
+        return response.json()
+    except ValueError:
+        raise APIError('The api answered with invalid json.', status=response.status)
+
+
+class MicroBatcher(object):
+    """
+    Collects the items submitted by concurrent callers for up to
+    wait seconds, or until there are size of them, and hands them
+    to send as a single list.
+    send returns one result per item, or a single result for all.
+    """
+
+    def __init__(self, send, size, wait):
+        self.send = send
+        self.size = size
+        self.wait = wait
+        self.pending = []
+        # when the pending items are due, None while there are none
+        self.deadline = None
+        self.condition = threading.Condition()
+        self.worker = None
+
+    def submit(self, item):
+        future = Future()
+
+        with self.condition:
+            self.pending.append((item, future))
+
+            if len(self.pending) >= self.size:
+                batch = self.take()
+            else:
+                batch = None
+
+                if self.deadline is None:
+                    self.deadline = time.monotonic() + self.wait
+                    self.start_worker()
+                    self.condition.notify()
+
+        if batch:
+            self.send_batch(batch)
+        return future
+
+    def take(self):
+        batch, self.pending = self.pending, []
+        self.deadline = None
+        return batch
+
+    def start_worker(self):
+        if self.worker is None:
+            # partial batches are all sent from one long lived thread,
+            # which keeps reusing its connection to the api.
+            self.worker = threading.Thread(target=self.run, name='aldryn-forms-batcher')
+            self.worker.daemon = True
+            self.worker.start()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.deadline is None or time.monotonic() < self.deadline:
+                    timeout = None if self.deadline is None else self.deadline - time.monotonic()
+                    self.condition.wait(timeout)
+                batch = self.take()
+
+            self.send_batch(batch)
+
+    def flush(self):
+        with self.condition:
+            batch = self.take()
+
+        if batch:
+            self.send_batch(batch)
+
+    def send_batch(self, batch):
+        try:
+            results = self.send([item for item, future in batch])
+        except Exception as e:
+            for item, future in batch:
+                future.set_exception(e)
+            return
+
+        if not isinstance(results, list) or len(results) != len(batch):
+            results = [results] * len(batch)
+
+        for (item, future), result in zip(batch, results):
+            future.set_result(result)
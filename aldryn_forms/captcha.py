@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from django import forms
+from django.conf import settings
+from django.utils.module_loading import import_string
+from django.utils.translation import gettext_lazy as _
+
+from .constants import (
+    CAPTCHA_TIMEOUT,
+    CAPTCHA_VERIFIER,
+    RECAPTCHA_PRIVATE_KEY,
+)
+from .http import PooledHTTPClient
+
+logger = logging.getLogger(__name__)
+
+
+class BaseCaptchaVerifier(object):
+
+    def verify(self, provider, token):
+        """
+        Returns True if the captcha token is valid.
+        """
+        raise NotImplementedError  # pragma: no cover
+
+
+class HTTPCaptchaVerifier(BaseCaptchaVerifier):
+    """
+    Verifies tokens with the provider's siteverify api
+    over pooled connections, with our own timeout.
+    Every token is checked with the provider, which only
+    accepts it once, so a solved captcha can't be replayed.
+    """
+    endpoints = {
+        'recaptcha': 'https://www.google.com/recaptcha/api/siteverify',
+        'turnstile': 'https://challenges.cloudflare.com/turnstile/v0/siteverify',
+    }
+
+    def __init__(self):
+        self.client = PooledHTTPClient(timeout=CAPTCHA_TIMEOUT)
+
+    def get_secret(self, provider):
+        if provider == 'turnstile':
+            return getattr(settings, 'TURNSTILE_SECRET', None)
+        return RECAPTCHA_PRIVATE_KEY
+
+    def is_success(self, provider, data):
+        if not data.get('success'):
+            return False
+
+        score = data.get('score')
+        # reCAPTCHA v3 only
+        threshold = getattr(settings, 'RECAPTCHA_SCORE_THRESHOLD', 0.5)
+        return score is None or score >= threshold
+
+    def verify(self, provider, token):
+        data = {
+            'secret': self.get_secret(provider),
+            'response': token,
+        }
+
+        try:
+            response = self.client.post_form(self.endpoints[provider], data)
+            verified = response.ok and self.is_success(provider, response.json())
+        except Exception:
+            # we can't tell, so the submission is rejected.
+            logger.exception('Could not verify %s captcha.', provider)
+            return False
+        return verified
+
+
+class LocalCaptchaVerifier(BaseCaptchaVerifier):
+    """
+    Accepts any token but invalid_token, without calling out.
+    Meant to be used in tests and load runs.
+    """
+    invalid_token = 'invalid'
+
+    def verify(self, provider, token):
+        return token != self.invalid_token
+
+
+_verifier = None
+
+
+def get_verifier():
+    global _verifier
+
+    if _verifier is None:
+        _verifier = import_string(CAPTCHA_VERIFIER)()
+    return _verifier
+
+
+# (field class, provider) -> field class verifying with get_verifier()
+_field_classes = {}
+
+
+def get_captcha_field_class(field_class, provider):
+    """
+    Returns a subclass of the captcha form field which verifies tokens
+    with the configured ALDRYN_FORMS_CAPTCHA_VERIFIER, or the field class
+    itself if there's none.
+    """
+    if not CAPTCHA_VERIFIER:
+        return field_class
+
+    key = (field_class, provider)
+
+    if key not in _field_classes:
+        def validate(self, value):
+            forms.Field.validate(self, value)
+
+            if value and not get_verifier().verify(provider, value):
+                raise forms.ValidationError(_('Captcha verification failed.'), code='captcha_invalid')
+
+        _field_classes[key] = type(field_class.__name__, (field_class,), {'validate': validate})
+    return _field_classes[key]
@@ -1,17 +1,20 @@
 # -*- coding: utf-8 -*-
-from PIL import Image
+import logging
+from functools import partial
 
 from django import forms
 from django.db.models import query
 from django.db.models import Max
 from django.contrib import messages
 from django.contrib.admin import TabularInline
-from django.core.cache import cache
 from django.core.validators import MinLengthValidator
-from django.template.loader import select_template, get_template
+from django.template import TemplateDoesNotExist
+from django.template.loader import select_template
 from django.utils.safestring import mark_safe
 from django.utils.translation import gettext, gettext_lazy as _
 
+from asgiref.sync import sync_to_async
+from cms.constants import EXPIRE_NOW
 from cms.plugin_base import CMSPluginBase
 from cms.plugin_pool import plugin_pool
 
@@ -42,13 +45,27 @@ from .forms import (
     FileFieldForm,
     ImageFieldForm,
     HiddenFieldForm,
+    VALIDATION_CHEAP,
+    VALIDATION_IO,
+    VALIDATION_NETWORK,
+)
+from .captcha import get_captcha_field_class
+from .filters import SubmissionRejected, render_submission_filters, run_submission_filters
+from .helpers import inspect_upload
+from .instrumentation import get_timer
+from .idempotency import (
+    SUBMISSION_KEY_FIELD,
+    claim_submission,
+    record_submission,
+    release_submission,
 )
-from .helpers import get_user_name
 from .models import SerializedFormField
+from .schema import get_form_schema
 from .signals import form_pre_save, form_post_save
-from .utils import get_action_backends
+from .tasks import defer_submission
+from .uploadhandler import get_upload_sha1
+from .utils import get_action_backends, run_in_thread
 from .validators import (
-    is_valid_recipient,
     MinChoicesValidator,
     MaxChoicesValidator,
     validate_alphabet
@@ -64,11 +81,50 @@ from .constants import (
     ENABLE_LOCALSTORAGE_COOKIE_CONTAINS,
     DO_NOT_SEND_NOTIFICATION_EMAIL_WHEN_USE_ACTION_BACKENDS,
     COUNTER_FIELD_UNIQ,
+    CACHE_RENDER_TEMPLATES,
+    CACHE_UNBOUND_FORMS,
+    DEDUPLICATE_UPLOADS,
+    DEFERRED_ACTIONS,
+)
+from .middleware import (
+    get_block_markers,
+    get_marker,
+    use_request_markers,
 )
 
+logger = logging.getLogger(__name__)
+
+# resolved render templates by (plugin class, form type, element type).
+# None means none of the candidates exist.
+_render_templates = {}
+
+
+def select_render_template(key, template_names):
+    """
+    Like select_template but remembers which candidate won for the given key,
+    so the template loaders are only probed once per process.
+    """
+    if not CACHE_RENDER_TEMPLATES:
+        return select_template(template_names)
+
+    try:
+        template = _render_templates[key]
+    except KeyError:
+        try:
+            template = select_template(template_names)
+        except TemplateDoesNotExist:
+            template = None
+        _render_templates[key] = template
+
+    if template is None:
+        raise TemplateDoesNotExist(', '.join(template_names))
+    return template
+
+
 class FormElement(CMSPluginBase):
-    # Don't cache anything.
-    cache = False
+    # Forms are only cached when rendered with request markers,
+    # see FormCacheMiddleware.
+    cache = CACHE_UNBOUND_FORMS
     module = _('Forms')
 
 
@@ -120,50 +176,210 @@ class FormPlugin(FieldContainer):
         elif request.method == 'POST':
             context['post_request'] = True
         context['form'] = form
+        self.add_submission_filter_fields(context, instance, request)
         if instance.get_gated_content_container and request.GET.get('noform') == 'true':
             context['post_success'] = True
 
         if ENABLE_LOCALSTORAGE:
             if ENABLE_LOCALSTORAGE_COOKIE:
-                if ENABLE_LOCALSTORAGE_COOKIE in request.COOKIES and ENABLE_LOCALSTORAGE_COOKIE_CONTAINS in request.COOKIES[ENABLE_LOCALSTORAGE_COOKIE]:
+                if use_request_markers(request):
+                    context['USE_LOCALSTORAGE'] = True
+                    context['localstorage_markers'] = get_block_markers('localstorage')
+                elif ENABLE_LOCALSTORAGE_COOKIE in request.COOKIES and ENABLE_LOCALSTORAGE_COOKIE_CONTAINS in request.COOKIES[ENABLE_LOCALSTORAGE_COOKIE]:
                     context['USE_LOCALSTORAGE'] = True
             else:
                 context['USE_LOCALSTORAGE'] = True
             if 'id' not in instance.form_attributes:
                 instance.form_attributes['id'] = 'form-%s' % instance.pk
 
+        if use_request_markers(request):
+            # filled in by FormCacheMiddleware on every request
+            context['csrf_token'] = get_marker('csrf')
         return context
 
+    def add_submission_filter_fields(self, context, instance, request):
+        """
+        Adds the fields the submission filters check to the context,
+        plugins overriding render have to call it too.
+        """
+        context['submission_filter_fields'] = render_submission_filters(instance, request)
+
+    def get_cache_expiration(self, request, instance, placeholder):
+        if not use_request_markers(request):
+            # bound forms and renders without markers hold per request data.
+            return EXPIRE_NOW
+
+        if instance.get_gated_content_container():
+            # the gated content is shown based on the query string.
+            return EXPIRE_NOW
+        return None
+
+    def get_vary_cache_on(self, request, instance, placeholder):
+        # the cms reads the placeholder cache for posts too and can only
+        # key it on request headers, not on the method. A GET carries no
+        # Content-Type while a form post always does, so varying on it keeps
+        # posts from getting the cached unbound form. Posts never fill the
+        # cache themselves, see get_cache_expiration.
+        return ['Content-Type']
+
     def get_render_template(self, context, instance, placeholder):
         template = instance.form_template
         if not template.startswith('aldryn_forms/'):
             template = 'aldryn_forms/' + template
-        return get_template(template)
+        return select_render_template(key=(self.__class__, template), template_names=[template])
     
     def form_valid(self, instance, request, form):
+        if DEFERRED_ACTIONS:
+            # the action backend runs later, see aldryn_forms.tasks
+            defer_submission(instance, request, form)
+            self.send_success_message(instance, request)
+            return
         action_backend = get_action_backends()[form.form_plugin.action_backend]()
         return action_backend.form_valid(self, instance, request, form)
 
+    async def aform_valid(self, instance, request, form):
+        if DEFERRED_ACTIONS:
+            await sync_to_async(defer_submission)(instance, request, form)
+            self.send_success_message(instance, request)
+            return
+        action_backend = get_action_backends()[form.form_plugin.action_backend]()
+        return await action_backend.aform_valid(self, instance, request, form)
+
     def form_invalid(self, instance, request, form):
         if instance.error_message:
             form._add_error(message=instance.error_message)
 
     def process_form(self, instance, request):
-        form_class = self.get_form_class(instance)
-        form_kwargs = self.get_form_kwargs(instance, request)
-        form = form_class(**form_kwargs)
+        if not self.is_form_submission(instance, request):
+            # nothing can be valid, skip validation, hooks and signals.
+            return self.get_unbound_form(instance, request)
+
+        form = None
+
+        try:
+            form = self.process_submission(instance, request)
+        finally:
+            get_timer(request).finish(instance, request, form)
+        return form
+
+    def process_submission(self, instance, request):
+        try:
+            run_submission_filters(instance, request)
+        except SubmissionRejected:
+            # junk isn't worth building the form for.
+            return self.get_unbound_form(instance, request)
+
+        form = self.get_bound_form(instance, request)
+
+        with get_timer(request).phase('validation'):
+            is_valid = form.is_valid()
+
+        if is_valid:
+            form.submission_outcome = claim_submission(instance, request)
+
+            if form.submission_outcome:
+                # a repeated post of a submission which was already handled.
+                return form
+
+            try:
+                self.run_pre_save_hooks(instance, request, form)
+
+                with get_timer(request).phase('action_backend'):
+                    self.form_valid(instance, request, form)
+            except Exception:
+                self.discard_uploads(form)
+                release_submission(instance, request)
+                raise
+            if form.errors:
+                # the backend turned the submission down.
+                self.discard_uploads(form)
+                self.form_invalid(instance, request, form)
+            self.record_submission(instance, request, form)
+            self.run_post_save_hooks(instance, request, form)
+        elif request.method == 'POST':
+            # only call form_invalid if request is POST and form is not valid
+            self.form_invalid(instance, request, form)
+        return form
+
+    async def aprocess_form(self, instance, request):
+        """
+        Async variant of process_form.
+        Validation, which may verify captchas, and the field hooks, which may
+        send emails, run on threads of their own so concurrent submissions
+        don't wait on each other.
+        """
+        if not self.is_form_submission(instance, request):
+            return await sync_to_async(self.get_unbound_form)(instance, request)
+
+        form = None
+
+        try:
+            form = await self.aprocess_submission(instance, request)
+        finally:
+            get_timer(request).finish(instance, request, form)
+        return form
+
+    async def aprocess_submission(self, instance, request):
+        try:
+            await sync_to_async(run_submission_filters)(instance, request)
+        except SubmissionRejected:
+            return await sync_to_async(self.get_unbound_form)(instance, request)
+
+        form = await run_in_thread(self.get_validated_form)(instance, request)
 
         if form.is_valid():
-            fields = [field for field in form.base_fields.values()
-                      if hasattr(field, '_plugin_instance')]
+            form.submission_outcome = await sync_to_async(claim_submission)(instance, request)
+
+            if form.submission_outcome:
+                return form
+
+            try:
+                await sync_to_async(self.run_pre_save_hooks)(instance, request, form)
+
+                with get_timer(request).phase('action_backend'):
+                    await self.aform_valid(instance, request, form)
+            except Exception:
+                await sync_to_async(self.discard_uploads)(form)
+                await sync_to_async(release_submission)(instance, request)
+                raise
+            if form.errors:
+                await sync_to_async(self.discard_uploads)(form)
+                self.form_invalid(instance, request, form)
+            await sync_to_async(self.record_submission)(instance, request, form)
+            await run_in_thread(self.run_post_save_hooks)(instance, request, form)
+        else:
+            self.form_invalid(instance, request, form)
+        return form
+
+    def get_bound_form(self, instance, request):
+        with get_timer(request).phase('form_class'):
+            form_class = self.get_form_schema(instance).form_class
+        form_kwargs = self.get_form_kwargs(instance, request)
+        return form_class(**form_kwargs)
 
-            # pre save field hooks
-            for field in fields:
-                field._plugin_instance.form_pre_save(
-                    instance=field._model_instance,
-                    form=form,
-                    request=request,
-                )
+    def get_validated_form(self, instance, request):
+        form = self.get_bound_form(instance, request)
+
+        with get_timer(request).phase('validation'):
+            form.full_clean()
+        return form
+
+    def run_pre_save_hooks(self, instance, request, form):
+        """
+        Runs the pre save field hooks and sends form_pre_save.
+        """
+        timer = get_timer(request)
+
+        with timer.phase('pre_save_hooks'):
+            for field in self.get_hook_fields(form):
+                plugin = field._plugin_instance
+
+                with timer.phase('pre_save.' + plugin.__class__.__name__):
+                    plugin.form_pre_save(
+                        instance=field._model_instance,
+                        form=form,
+                        request=request,
+                    )
 
             form_pre_save.send(
                 sender=models.FormPlugin,
@@ -172,17 +388,22 @@ class FormPlugin(FieldContainer):
                 request=request,
             )
 
-            self.form_valid(instance, request, form)
-            if form.errors:
-                self.form_invalid(instance, request, form)
+    def run_post_save_hooks(self, instance, request, form):
+        """
+        Runs the post save field hooks and sends form_post_save.
+        """
+        timer = get_timer(request)
+
+        with timer.phase('post_save_hooks'):
+            for field in self.get_hook_fields(form):
+                plugin = field._plugin_instance
 
-            # post save field hooks
-            for field in fields:
-                field._plugin_instance.form_post_save(
-                    instance=field._model_instance,
-                    form=form,
-                    request=request,
-                )
+                with timer.phase('post_save.' + plugin.__class__.__name__):
+                    plugin.form_post_save(
+                        instance=field._model_instance,
+                        form=form,
+                        request=request,
+                    )
 
             form_post_save.send(
                 sender=models.FormPlugin,
@@ -190,10 +411,33 @@ class FormPlugin(FieldContainer):
                 form=form,
                 request=request,
             )
-        elif request.method == 'POST':
-            # only call form_invalid if request is POST and form is not valid
-            self.form_invalid(instance, request, form)
-        return form
+
+    def discard_uploads(self, form):
+        """
+        Deletes the files stored for a submission which failed,
+        so they aren't left behind without a submission.
+        """
+        for filer_file in form.stored_uploads:
+            try:
+                filer_file.file.delete(save=False)
+                filer_file.delete()
+            except Exception:
+                logger.exception('Could not remove upload %s of a failed submission.', filer_file.pk)
+        form.stored_uploads = []
+
+    def record_submission(self, instance, request, form):
+        """
+        Remembers the outcome of a submission for repeated posts of it.
+        """
+        if form.errors:
+            # the backend rejected it, it may be sent again.
+            release_submission(instance, request)
+        else:
+            record_submission(instance, request, self.get_form_success_url(instance, form))
+
+    def get_hook_fields(self, form):
+        return [field for field in form.base_fields.values()
+                if hasattr(field, '_plugin_instance')]
 
     def get_form_class(self, instance):
         """
@@ -216,50 +460,110 @@ class FormPlugin(FieldContainer):
             form_fields[field.name] = field_plugin.get_form_field(plugin_instance)
         return form_fields
 
+    def get_form_schema(self, instance):
+        """
+        Returns the cached form schema, looked up once
+        per form plugin instance.
+        """
+        try:
+            return instance._aldryn_forms_schema
+        except AttributeError:
+            instance._aldryn_forms_schema = get_form_schema(self, instance)
+            return instance._aldryn_forms_schema
+
+    def get_unbound_form(self, instance, request):
+        """
+        Builds the form for a request which doesn't submit it,
+        from the cached form schema.
+        """
+        form_class = self.get_form_schema(instance).form_class
+        kwargs = self.get_form_kwargs(instance, request)
+        # also used for posts which are turned away.
+        kwargs.pop('data', None)
+        kwargs.pop('files', None)
+        return form_class(**kwargs)
+
+    def is_form_submission(self, instance, request):
+        if request.method not in ('POST', 'PUT'):
+            return False
+        form_plugin_id = request.POST.get('form_plugin_id') or ''
+        return form_plugin_id.isdigit() and int(form_plugin_id) == instance.pk
+
     def get_form_kwargs(self, instance, request):
         kwargs = {
             'form_plugin': instance,
             'request': request,
         }
 
-        if request.method in ('POST', 'PUT'):
-            form_plugin_id = request.POST.get('form_plugin_id') or ''
-            if form_plugin_id.isdigit() and int(form_plugin_id) == instance.pk:
-                kwargs['data'] = request.POST.copy()
-                kwargs['data']['language'] = instance.language
-                kwargs['data']['form_plugin_id'] = instance.pk
-                kwargs['files'] = request.FILES
+        if self.is_form_submission(instance, request):
+            kwargs['data'] = request.POST.copy()
+            kwargs['data']['language'] = instance.language
+            kwargs['data']['form_plugin_id'] = instance.pk
+            kwargs['files'] = request.FILES
 
-        initial = {}
-        form_fields = {}
-
-        fields = instance.get_form_fields()
-        for field in fields:
-            plugin_instance = field.plugin_instance
-            if isinstance(plugin_instance.get_plugin_class_instance(), GetHiddenField) and field.name in request.GET:
-                initial[field.name] = request.GET[field.name]
+        request_fields = self.get_form_schema(instance).request_fields
+        initial = self.get_request_initial(request_fields, request)
         if initial:
             kwargs['initial'] = initial
         return kwargs
 
+    def get_request_fields(self, instance):
+        """
+        Returns (name, default value) for the fields
+        which take their initial value from the query string.
+        """
+        request_fields = []
+
+        for field in instance.get_form_fields():
+            plugin_instance = field.plugin_instance
+            if isinstance(plugin_instance.get_plugin_class_instance(), GetHiddenField):
+                request_fields.append((field.name, plugin_instance.initial_value or ''))
+        return request_fields
+
+    def get_request_initial(self, request_fields, request):
+        initial = {}
+        use_markers = use_request_markers(request)
+
+        if use_markers:
+            # every render of the cached form gets a key of its own.
+            initial[SUBMISSION_KEY_FIELD] = get_marker('submission_key')
+
+        for name, default in request_fields:
+            if use_markers:
+                initial[name] = get_marker('get', name, default)
+            elif name in request.GET:
+                initial[name] = request.GET[name]
+        return initial
+
     def get_success_url(self, instance):
         return instance.success_url
 
+    def get_form_success_url(self, instance, form):
+        """
+        Returns the url to go to after the given form was submitted.
+        """
+        return self.get_success_url(instance)
+
     def send_success_message(self, instance, request):
         """
         Sends a success message to the request user
         using django's contrib.messages app.
         """
         message = instance.success_message or gettext('The form has been sent.')
-        messages.success(request, mark_safe(message))
+        # deferred action backends run without messages support
+        messages.success(request, mark_safe(message), fail_silently=True)
 
     def send_notifications(self, instance, form, request=None):
-        users = instance.recipients.exclude(email='')
+        with get_timer(request).phase('notifications'):
+            return self.deliver_notifications(instance, form, request)
 
-        recipients = [user for user in users.iterator()
-                      if is_valid_recipient(user.email)]
+    def deliver_notifications(self, instance, form, request=None):
+        """
+        Sends the notification emails, returns the recipients notified.
+        """
+        users_notified = instance.get_notification_recipients()
 
-        if recipients:
+        if users_notified:
             context = {
                 'form_name': instance.name,
                 'form_data': form.get_serialized_field_choices(),
@@ -270,15 +574,12 @@ class FormPlugin(FieldContainer):
             if MANDRILL and MANDRILL_DEFAULT_TEMPLATE:
                 kwargs['mandrill_template'] = MANDRILL_DEFAULT_TEMPLATE
             send_mail(
-                recipients=[user.email for user in recipients],
+                recipients=[email for name, email in users_notified],
                 context=context,
                 template_base='aldryn_forms/emails/notification',
                 language=instance.language,
                 **kwargs
             )
-
-        users_notified = [
-            (get_user_name(user), user.email) for user in recipients]
         return users_notified
 
 
@@ -309,7 +610,8 @@ class Fieldset(FieldContainer):
             # unfortunately, there's no builtin way to enforce this on the cms
             form_plugin = None
         templates = self.get_template_names(instance, form_plugin)
-        return select_template(templates)
+        key = (self.__class__, form_plugin.plugin_type if form_plugin else None)
+        return select_render_template(key, templates)
 
     def get_template_names(self, instance, form_plugin=None):
         template_names = ['aldryn_forms/fieldset.html']
@@ -337,6 +639,8 @@ class Field(FormElement):
         'attributes',
     ]
     form_field_disabled_options = []
+    # fields are validated cheapest first, see FormSubmissionBaseForm
+    validation_cost = VALIDATION_CHEAP
 
     # Used to configure default fieldset in admin form
     fieldset_general_fields = [
@@ -453,7 +757,8 @@ class Field(FormElement):
             # unfortunately, there's no builtin way to enforce this on the cms
             form_plugin = None
         templates = self.get_template_names(instance, form_plugin)
-        return select_template(templates)
+        key = (self.__class__, form_plugin.plugin_type if form_plugin else None, instance.field_type)
+        return select_render_template(key, templates)
 
     def get_fieldsets(self, request, obj=None):
         if self.fieldsets or self.fields:
@@ -624,23 +929,23 @@ class CounterHiddenField(BaseTextField):
     fieldset_advanced_fields = []
 
     def form_pre_save(self, instance, form, **kwargs):
-        key = self.get_cache_key(instance)
-        try:
-            value = cache.incr(key)
-        except ValueError:
-            value = self.get_max_value(instance) or self.get_min_value(instance) or 0
-            value += 1
-            cache.set(key, value)
-        instance.max_value = value
-        instance.save()
+        key = self.get_counter_key(instance)
+        value = models.FieldCounter.next_value(key, seed=partial(self.get_seed_value, instance))
         field_name = form.form_plugin.get_form_field_name(field=instance)
         form.cleaned_data[field_name] = value
 
-    def get_cache_key(self, instance):
+    def get_counter_key(self, instance):
         if COUNTER_FIELD_UNIQ:
             return 'counter-hidden-field-%s' % instance.pk
         return 'counter-hidden-field'
 
+    def get_seed_value(self, instance):
+        """
+        Where a new counter starts, so existing counters carry on
+        from the value they last handed out.
+        """
+        return self.get_max_value(instance) or self.get_min_value(instance) or 0
+
     def get_max_value(self, instance):
         if COUNTER_FIELD_UNIQ:
             return instance.max_value
@@ -751,6 +1056,7 @@ class FileField(Field):
     form = FileFieldForm
     form_field = RestrictedFileField
     form_field_widget = RestrictedFileField.widget
+    validation_cost = VALIDATION_IO
     form_field_enabled_options = [
         'label',
         'help_text',
@@ -773,7 +1079,7 @@ class FileField(Field):
         if instance.max_size:
             try:
                 from sizefield.utils import filesizeformat
-                if 'help_text' in kwargs:
+                if kwargs.get('help_text'):
                     kwargs['help_text'] = kwargs['help_text'].replace(
                         'MAXSIZE', filesizeformat(instance.max_size))
             except ImportError:
@@ -782,17 +1088,20 @@ class FileField(Field):
         return kwargs
 
     def serialize_value(self, instance, value, is_confirmation=False):
-        if value:
-            return (value.original_filename if is_confirmation
-                    else value.absolute_uri)
-        else:
+        if not value:
             return '-'
+        if not hasattr(value, 'absolute_uri'):
+            # not stored, see BaseAction.persist_uploads
+            return value.name
+        return (value.original_filename if is_confirmation
+                else value.absolute_uri)
 
     def form_pre_save(self, instance, form, **kwargs):
         """Save the uploaded file to django-filer
 
-        The type of model (file or image) is automatically chosen by trying to
-        open the uploaded file.
+        The type of model (file or image) is automatically chosen by
+        inspecting the header of the uploaded file.
+        Nothing is stored if the form's action backend doesn't keep uploads.
         """
         request = kwargs['request']
 
@@ -803,22 +1112,40 @@ class FileField(Field):
         if uploaded_file is None:
             return
 
-        try:
-            with Image.open(uploaded_file) as img:
-                img.verify()
-        except:  # noqa
-            model = filemodels.File
-        else:
+        action_backend = get_action_backends()[form.form_plugin.action_backend]
+
+        if not action_backend.persist_uploads:
+            return
+
+        if inspect_upload(uploaded_file).is_image:
             model = imagemodels.Image
+        else:
+            model = filemodels.File
 
-        filer_file = model(
-            folder=instance.upload_to,
-            file=uploaded_file,
-            name=uploaded_file.name,
-            original_filename=uploaded_file.name,
-            is_public=True,
-        )
-        filer_file.save()
+        filer_file = None
+
+        if DEDUPLICATE_UPLOADS:
+            # reuse the same file uploaded to the same folder under the same
+            # name before. the name shows in emails and exports, and the url,
+            # so files named differently by another submitter aren't shared.
+            sha1 = get_upload_sha1(uploaded_file)
+            filer_file = model.objects.filter(
+                folder_id=instance.upload_to_id,
+                sha1=sha1,
+                original_filename=uploaded_file.name,
+            ).first()
+
+        if filer_file is None:
+            filer_file = model(
+                folder=instance.upload_to,
+                file=uploaded_file,
+                name=uploaded_file.name,
+                original_filename=uploaded_file.name,
+                is_public=True,
+            )
+            filer_file.save()
+            # removed again if the submission fails
+            form.stored_uploads.append(filer_file)
 
         # NOTE: This is a hack to make the full URL available later when we
         # need to serialize this field. We avoid to serialize it here directly
@@ -1014,6 +1341,15 @@ class RadioSelectField(Field):
         return kwargs
 
 
+class CaptchaFieldMixin(object):
+    # the provider tokens are verified with when
+    # ALDRYN_FORMS_CAPTCHA_VERIFIER is set, see aldryn_forms.captcha
+    captcha_provider = None
+
+    def get_form_field_class(self, instance):
+        return get_captcha_field_class(self.form_field, self.captcha_provider)
+
+
 try:
     from captcha.fields import CaptchaField, CaptchaTextInput
 except ImportError:
@@ -1025,6 +1361,7 @@ else:
         form = CaptchaFieldForm
         form_field = CaptchaField
         form_field_widget = CaptchaTextInput
+        validation_cost = VALIDATION_IO
         form_field_enabled_options = ['label', 'error_messages']
         fieldset_general_fields = [
             'label',
@@ -1053,11 +1390,13 @@ else:
 
     if RECAPTCHA_USE_V3:
         @plugin_pool.register_plugin
-        class ReCaptchaField(Field):
+        class ReCaptchaField(CaptchaFieldMixin, Field):
             name = _('Re Captcha Field')
             form = CaptchaFieldForm
             form_field = ReCaptcha3Field
             form_field_widget = ReCaptchaHiddenInput
+            validation_cost = VALIDATION_NETWORK
+            captcha_provider = 'recaptcha'
             form_field_enabled_options = ['label', 'error_messages']
             fieldset_general_fields = [
                 'label',
@@ -1077,11 +1416,13 @@ else:
 
     else:
         @plugin_pool.register_plugin
-        class ReCaptchaField(Field):
+        class ReCaptchaField(CaptchaFieldMixin, Field):
             name = _('Re Captcha Field')
             form = CaptchaFieldForm
             form_field = ReCaptcha2Field
             form_field_widget = ReCaptchaWidget
+            validation_cost = VALIDATION_NETWORK
+            captcha_provider = 'recaptcha'
             form_field_enabled_options = ['label', 'error_messages']
             fieldset_general_fields = [
                 'label',
@@ -1105,11 +1446,13 @@ except ImportError:
 else:
     # Don't like doing this. But we shouldn't force captcha.
     @plugin_pool.register_plugin
-    class TurnstileCaptchaField(Field):
+    class TurnstileCaptchaField(CaptchaFieldMixin, Field):
         name = _('Turnstile Captcha Field')
         form = CaptchaFieldForm
         form_field = TurnstileField
         form_field_widget = TurnstileWidget
+        validation_cost = VALIDATION_NETWORK
+        captcha_provider = 'turnstile'
         form_field_enabled_options = ['label', 'error_messages']
         fieldset_general_fields = [
             'label',
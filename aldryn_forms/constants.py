@@ -92,4 +92,191 @@ COUNTER_FIELD_UNIQ = getattr(
     'ALDRYN_FORMS_COUNTER_FIELD_UNIQ',
     False,
 )
-
+ROUTING_TABLE_CACHE_TIMEOUT = getattr(
+    settings,
+    'ALDRYN_FORMS_ROUTING_TABLE_CACHE_TIMEOUT',
+    60 * 60,
+)
+NOTIFICATION_RENDER_WORKERS = getattr(
+    settings,
+    'ALDRYN_FORMS_NOTIFICATION_RENDER_WORKERS',
+    0,
+)
+MANDRILL_BATCH_TRANSPORT = getattr(
+    settings,
+    'ALDRYN_FORMS_MANDRILL_BATCH_TRANSPORT',
+    None,
+)
+RECIPIENTS_CACHE_TIMEOUT = getattr(
+    settings,
+    'ALDRYN_FORMS_RECIPIENTS_CACHE_TIMEOUT',
+    60 * 60,
+)
+CACHE_RENDER_TEMPLATES = getattr(
+    settings,
+    'ALDRYN_FORMS_CACHE_RENDER_TEMPLATES',
+    not settings.DEBUG,
+)
+CACHE_UNBOUND_FORMS = getattr(
+    settings,
+    'ALDRYN_FORMS_CACHE_UNBOUND_FORMS',
+    False,
+)
+COUNTER_BLOCK_SIZE = getattr(
+    settings,
+    'ALDRYN_FORMS_COUNTER_BLOCK_SIZE',
+    1,
+)
+MAX_UPLOAD_SIZE = getattr(
+    settings,
+    'ALDRYN_FORMS_MAX_UPLOAD_SIZE',
+    None,
+)
+DEDUPLICATE_UPLOADS = getattr(
+    settings,
+    'ALDRYN_FORMS_DEDUPLICATE_UPLOADS',
+    False,
+)
+CAPTCHA_VERIFIER = getattr(
+    settings,
+    'ALDRYN_FORMS_CAPTCHA_VERIFIER',
+    None,
+)
+CAPTCHA_TIMEOUT = getattr(
+    settings,
+    'ALDRYN_FORMS_CAPTCHA_TIMEOUT',
+    5,
+)
+SUBMISSION_SPOOL = getattr(
+    settings,
+    'ALDRYN_FORMS_SUBMISSION_SPOOL',
+    None,
+)
+# whether every spooled submission is synced to disk in the request,
+# so it survives a power loss and not only a crash of the process.
+SUBMISSION_SPOOL_FSYNC = getattr(
+    settings,
+    'ALDRYN_FORMS_SUBMISSION_SPOOL_FSYNC',
+    False,
+)
+SUBMISSION_FLUSH_INTERVAL = getattr(
+    settings,
+    'ALDRYN_FORMS_SUBMISSION_FLUSH_INTERVAL',
+    500,
+)
+SUBMISSION_FLUSH_SIZE = getattr(
+    settings,
+    'ALDRYN_FORMS_SUBMISSION_FLUSH_SIZE',
+    100,
+)
+DEFERRED_ACTIONS = getattr(
+    settings,
+    'ALDRYN_FORMS_DEFERRED_ACTIONS',
+    False,
+)
+DEFERRED_ACTION_WORKERS = getattr(
+    settings,
+    'ALDRYN_FORMS_DEFERRED_ACTION_WORKERS',
+    0,
+)
+DEFERRED_ACTION_MAX_ATTEMPTS = getattr(
+    settings,
+    'ALDRYN_FORMS_DEFERRED_ACTION_MAX_ATTEMPTS',
+    5,
+)
+API_ENDPOINT = getattr(
+    settings,
+    'ALDRYN_FORMS_API_ENDPOINT',
+    None,
+)
+API_HEADERS = getattr(
+    settings,
+    'ALDRYN_FORMS_API_HEADERS',
+    {},
+)
+API_TIMEOUT = getattr(
+    settings,
+    'ALDRYN_FORMS_API_TIMEOUT',
+    10,
+)
+API_CONCURRENCY = getattr(
+    settings,
+    'ALDRYN_FORMS_API_CONCURRENCY',
+    4,
+)
+API_BATCH_SIZE = getattr(
+    settings,
+    'ALDRYN_FORMS_API_BATCH_SIZE',
+    1,
+)
+API_BATCH_WAIT = getattr(
+    settings,
+    'ALDRYN_FORMS_API_BATCH_WAIT',
+    50,
+)
+COMPOSITE_ACTION_BACKENDS = getattr(
+    settings,
+    'ALDRYN_FORMS_COMPOSITE_ACTION_BACKENDS',
+    [],
+)
+COMPOSITE_ACTION_TIMEOUT = getattr(
+    settings,
+    'ALDRYN_FORMS_COMPOSITE_ACTION_TIMEOUT',
+    30,
+)
+SUBMISSION_KEY_TIMEOUT = getattr(
+    settings,
+    'ALDRYN_FORMS_SUBMISSION_KEY_TIMEOUT',
+    0,
+)
+SUBMISSION_FILTERS = getattr(
+    settings,
+    'ALDRYN_FORMS_SUBMISSION_FILTERS',
+    [],
+)
+HONEYPOT_FIELD = getattr(
+    settings,
+    'ALDRYN_FORMS_HONEYPOT_FIELD',
+    'aldryn_forms_website',
+)
+MIN_FILL_TIME = getattr(
+    settings,
+    'ALDRYN_FORMS_MIN_FILL_TIME',
+    3,
+)
+SUBMISSION_BUCKET_SIZE = getattr(
+    settings,
+    'ALDRYN_FORMS_SUBMISSION_BUCKET_SIZE',
+    10,
+)
+SUBMISSION_BUCKET_RATE = getattr(
+    settings,
+    'ALDRYN_FORMS_SUBMISSION_BUCKET_RATE',
+    10 / 60.0,
+)
+# scope ('form', 'ip' or 'session') -> (submissions, seconds)
+RATE_LIMITS = getattr(
+    settings,
+    'ALDRYN_FORMS_RATE_LIMITS',
+    {},
+)
+SLOW_SUBMISSION_THRESHOLD = getattr(
+    settings,
+    'ALDRYN_FORMS_SLOW_SUBMISSION_THRESHOLD',
+    2,
+)
+STATSD_ADDRESS = getattr(
+    settings,
+    'ALDRYN_FORMS_STATSD_ADDRESS',
+    None,
+)
+STATSD_PREFIX = getattr(
+    settings,
+    'ALDRYN_FORMS_STATSD_PREFIX',
+    'aldryn_forms',
+)
+SCHEMA_CACHE_SIZE = getattr(
+    settings,
+    'ALDRYN_FORMS_SCHEMA_CACHE_SIZE',
+    256,
+)
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 
 from email.utils import parseaddr
@@ -13,12 +14,19 @@ except ImportError:
 
 from django.contrib import admin
 from django.core.mail import get_connection
+from django.db import connections
+from django.utils import translation
 from django.utils.translation import gettext_lazy as _
 from django.utils.safestring import mark_safe
 
 from cms.plugin_pool import plugin_pool
 
 from aldryn_forms.cms_plugins import FormPlugin
+from aldryn_forms.middleware import (
+    get_block_markers,
+    get_marker,
+    use_request_markers,
+)
 from aldryn_forms.validators import is_valid_recipient
 from aldryn_forms.constants import (
     ENABLE_FORM_TEMPLATE,
@@ -28,7 +36,10 @@ from aldryn_forms.constants import (
     ENABLE_LOCALSTORAGE_COOKIE,
     ENABLE_LOCALSTORAGE_COOKIE_CONTAINS,
     ENABLE_FORM_ID,
+    NOTIFICATION_RENDER_WORKERS,
+    MANDRILL_BATCH_TRANSPORT,
 )
+from .mandrill import get_delivered_recipients, send_batched_mail
 from .notification import DefaultNotificationConf
 from .models import EmailNotification, FieldConditional, EmailNotificationFormPlugin
 from . import forms
@@ -37,6 +48,16 @@ from . import forms
 logger = logging.getLogger(__name__)
 
 
+def render_email(language, renderer):
+    try:
+        # worker threads don't inherit the active language
+        with translation.override(language):
+            return renderer()
+    finally:
+        # each worker thread gets its own database connections
+        connections.close_all()
+
+
 class NewEmailNotificationInline(admin.StackedInline):
     extra = 1
     fields = ['theme']
@@ -263,7 +284,7 @@ class EmailNotificationForm(FormPlugin):
                        if isinstance(inline, (NewEmailNotificationInline, NewFieldConditionalInline))]
         return inlines
 
-    def send_notifications(self, instance, form, request=None):
+    def deliver_notifications(self, instance, form, request=None):
         recipients = []
         emails = []
         if not MANDRILL:
@@ -276,29 +297,29 @@ class EmailNotificationForm(FormPlugin):
                 logger.exception("Could not send notification emails.")
                 return []
 
-        conditionals = self.get_conditionals(instance, form, 'email')
-        if conditionals:
-            for conditional in conditionals:
-                emails.append(conditional.prepare_email(form=form))
-                recipients.append(parseaddr(conditional.action_value))
-
         redirect_emails = self.get_conditionals(instance, form, 'redirect-email')
+        conditionals = self.get_conditionals(instance, form, 'email') + redirect_emails
+        renderers = [partial(conditional.prepare_email, form=form) for conditional in conditionals]
+        recipients.extend(parseaddr(conditional.action_value) for conditional in conditionals)
+
         if redirect_emails:
-            for conditional in redirect_emails:
-                emails.append(conditional.prepare_email(form=form))
-                recipients.append(parseaddr(conditional.action_value))
+            emails.extend(self.render_emails(form, renderers))
         else:
-            recipients = super(EmailNotificationForm, self).send_notifications(instance, form, request)
-            notifications = instance.email_notifications.select_related('form')
+            recipients = super(EmailNotificationForm, self).deliver_notifications(instance, form, request)
+            notifications = instance.email_notifications.select_related('form', 'to_user')
 
             for notification in notifications:
-                email = notification.prepare_email(form=form)
-                copy_email = notification.prepare_copy_email(form=form)
+                renderers.append(partial(notification.prepare_email, form=form))
+                renderers.append(partial(notification.prepare_copy_email, form=form))
 
+            rendered = self.render_emails(form, renderers)
+            emails.extend(rendered[:len(conditionals)])
+            rendered = rendered[len(conditionals):]
+
+            for email, copy_email in zip(rendered[::2], rendered[1::2]):
                 to_email = email['to'][0]['email'] if MANDRILL else email.to[0]
                 to_copy_email = copy_email['to'][0]['email'] if MANDRILL else copy_email.to[0]
 
-
                 if is_valid_recipient(to_email):
                     emails.append(email)
                     recipients.append(parseaddr(to_email))
@@ -306,8 +327,14 @@ class EmailNotificationForm(FormPlugin):
                     emails.append(copy_email)
                     recipients.append(parseaddr(to_copy_email))
 
-
-        if MANDRILL:
+        if MANDRILL and MANDRILL_BATCH_TRANSPORT:
+            try:
+                results = send_batched_mail(emails, MANDRILL_DEFAULT_TEMPLATE)
+            except:  # noqa
+                logger.exception("Could not send notification emails.")
+                return []
+            return get_delivered_recipients(recipients, results)
+        elif MANDRILL:
             for email in emails:
                 send_constructed_mail(email, MANDRILL_DEFAULT_TEMPLATE)
             return recipients
@@ -320,6 +347,25 @@ class EmailNotificationForm(FormPlugin):
                 recipients = []
             return recipients
 
+    def render_emails(self, form, renderers):
+        """
+        Calls each email renderer and returns the emails in the same order.
+        Renderers run on a bounded thread pool when more than one
+        ALDRYN_FORMS_NOTIFICATION_RENDER_WORKERS is configured.
+        """
+        workers = min(NOTIFICATION_RENDER_WORKERS, len(renderers))
+
+        if workers < 2:
+            return [render() for render in renderers]
+
+        # load the form tree upfront so the workers don't race to build it.
+        form.form_plugin.get_form_fields()
+
+        render = partial(render_email, translation.get_language())
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(render, renderers))
+
     def render(self, context, instance, placeholder):
         context = super(FormPlugin, self).render(context, instance, placeholder)
         request = context['request']
@@ -328,36 +374,49 @@ class EmailNotificationForm(FormPlugin):
 
         if form.is_valid():
             context['post_success'] = True
-            conditionals = self.get_conditionals(instance, form, 'redirect')
-            if conditionals:
-                context['form_success_url'] = conditionals[0].action_value
-            else:
-                context['form_success_url'] = self.get_success_url(instance)
+            context['form_success_url'] = self.get_form_success_url(instance, form)
         context['form'] = form
+        self.add_submission_filter_fields(context, instance, request)
         if instance.get_gated_content_container and request.GET.get('noform') == 'true':
             context['post_success'] = True
         context['USE_LOCALSTORAGE'] = False
         if ENABLE_LOCALSTORAGE:
             if ENABLE_LOCALSTORAGE_COOKIE:
-                if ENABLE_LOCALSTORAGE_COOKIE in request.COOKIES and ENABLE_LOCALSTORAGE_COOKIE_CONTAINS in request.COOKIES[ENABLE_LOCALSTORAGE_COOKIE]:
+                if use_request_markers(request):
+                    context['USE_LOCALSTORAGE'] = True
+                    context['localstorage_markers'] = get_block_markers('localstorage')
+                elif ENABLE_LOCALSTORAGE_COOKIE in request.COOKIES and ENABLE_LOCALSTORAGE_COOKIE_CONTAINS in request.COOKIES[ENABLE_LOCALSTORAGE_COOKIE]:
                     context['USE_LOCALSTORAGE'] = True
             else:
                 context['USE_LOCALSTORAGE'] = True
         context['enable_localstorage'] = context['USE_LOCALSTORAGE']
+
+        if use_request_markers(request):
+            # filled in by FormCacheMiddleware on every request
+            context['csrf_token'] = get_marker('csrf')
         return context
 
+    def get_form_success_url(self, instance, form):
+        conditionals = self.get_conditionals(instance, form, 'redirect')
+        if conditionals:
+            return conditionals[0].action_value
+        return self.get_success_url(instance)
+
     def get_conditionals(self, instance, form, action_type):
-        conditionals = []
-        form_data = form.get_serialized_field_dict()
-        for c in instance.conditionals.select_related('form'):
-            value = form_data.get(c.field_name)
-            if c.action_type == action_type and value and c.field_value in value.split(', '):
-                if action_type in ['email', 'redirect-email']:
-                     if is_valid_recipient(c.action_value):
-                         conditionals.append(c)
-                else:
-                    conditionals.append(c)
-        return conditionals
+        return self.get_conditional_routes(instance, form).get(action_type, [])
+
+    def get_conditional_routes(self, instance, form):
+        """
+        Matches the submitted data against the form's routing table
+        in a single pass and memoizes the result on the form.
+        """
+        routes = getattr(form, '_conditional_routes', None)
+
+        if routes is None:
+            table = instance.get_routing_table()
+            routes = table.resolve(instance, form.get_serialized_field_dict())
+            form._conditional_routes = routes
+        return routes
 
 
 plugin_pool.register_plugin(EmailNotificationForm)
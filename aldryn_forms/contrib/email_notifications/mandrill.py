@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+import json
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from aldryn_forms.constants import MANDRILL_BATCH_TRANSPORT
+
+
+MANDRILL_SEND_TEMPLATE_URL = 'https://mandrillapp.com/api/1.0/messages/send-template.json'
+
+# message keys which are specific to a recipient and
+# end up in the recipient's merge vars when batching.
+RECIPIENT_KEYS = ('to', 'merge_vars', 'global_merge_vars')
+
+# per recipient statuses of messages mandrill won't deliver
+FAILED_STATUSES = ('rejected', 'invalid')
+
+
+class BaseMandrillTransport(object):
+
+    def send_batch(self, template_name, message):
+        """
+        Sends a single "send-template" API call and returns
+        the list of per recipient results.
+        """
+        raise NotImplementedError  # pragma: no cover
+
+
+class MandrillAPITransport(BaseMandrillTransport):
+    url = MANDRILL_SEND_TEMPLATE_URL
+    timeout = 10
+
+    def get_api_key(self):
+        return settings.MANDRILL_API_KEY
+
+    def send_batch(self, template_name, message):
+        payload = {
+            'key': self.get_api_key(),
+            'template_name': template_name,
+            'template_content': [],
+            'message': message,
+        }
+        request = Request(
+            self.url,
+            data=json.dumps(payload).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+        )
+
+        with urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+
+
+class LocmemMandrillTransport(BaseMandrillTransport):
+    """
+    Keeps the batches in memory instead of calling the API.
+    Meant to be used in tests and load runs.
+    """
+
+    def __init__(self):
+        self.outbox = []
+
+    def send_batch(self, template_name, message):
+        self.outbox.append((template_name, message))
+        return [{'email': rcpt['email'], 'status': 'sent'} for rcpt in message['to']]
+
+
+def get_transport():
+    return import_string(MANDRILL_BATCH_TRANSPORT)()
+
+
+def get_group_key(message):
+    shared = dict((key, value) for key, value in message.items() if key not in RECIPIENT_KEYS)
+    return json.dumps(shared, sort_keys=True, default=str)
+
+
+def build_batches(messages):
+    """
+    Merges messages which only differ on their recipients into
+    a single message with merge vars per recipient.
+    """
+    batches = []
+    batches_by_key = {}
+
+    for message in messages:
+        key = get_group_key(message)
+        batch = batches_by_key.get(key)
+        recipients = [rcpt['email'] for rcpt in message['to']]
+
+        if batch is not None and any(rcpt['rcpt'] in recipients for rcpt in batch['merge_vars']):
+            # merge vars are keyed by recipient, so the same address
+            # can only be part of a batch once.
+            batch = None
+
+        if batch is None:
+            batch = dict((key, value) for key, value in message.items() if key not in RECIPIENT_KEYS)
+            batch.update({
+                'to': [],
+                'merge_vars': [],
+                'preserve_recipients': False,
+            })
+            batches.append(batch)
+            batches_by_key[key] = batch
+
+        merge_vars = dict(
+            (item['rcpt'], item.get('vars', [])) for item in message.get('merge_vars', [])
+        )
+
+        for rcpt in message['to']:
+            batch['to'].append(dict(rcpt, type='to'))
+            batch['merge_vars'].append({
+                'rcpt': rcpt['email'],
+                'vars': message.get('global_merge_vars', []) + merge_vars.get(rcpt['email'], []),
+            })
+    return batches
+
+
+def send_batched_mail(messages, template_name):
+    transport = get_transport()
+    results = []
+
+    for batch in build_batches(messages):
+        results.extend(transport.send_batch(template_name, batch))
+    return results
+
+
+def get_delivered_recipients(recipients, results):
+    """
+    Returns the (name, email) recipients mandrill accepted
+    a message for, according to the results of send_batched_mail.
+    """
+    delivered = set(
+        result['email'].lower() for result in results
+        if result.get('status') not in FAILED_STATUSES
+    )
+    return [recipient for recipient in recipients if recipient[1].lower() in delivered]
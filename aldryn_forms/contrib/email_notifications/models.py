@@ -5,6 +5,8 @@ from functools import partial
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.translation import gettext, gettext_lazy as _
 
 from djangocms_text_ckeditor.fields import HTMLField
@@ -22,6 +24,7 @@ from .helpers import (
     get_theme_template_name,
     render_text
 )
+from .routing import RoutingTable
 from aldryn_forms.constants import DO_NOT_SEND_NOTIFICATION_EMAIL_WHEN_USE_ACTION_BACKENDS
 
 EMAIL_THEMES = getattr(
@@ -67,6 +70,9 @@ class EmailNotificationFormPlugin(FormPlugin):
         choices = notification_conf.get_context_keys_as_choices()
         return choices
 
+    def get_routing_table(self):
+        return RoutingTable.for_form(self)
+
 
 class EmailNotification(models.Model):
 
@@ -367,3 +373,9 @@ class FieldConditional(models.Model):
 
     def render_subject(self, context):
         return ''
+
+
+@receiver(post_save, sender=FieldConditional)
+@receiver(post_delete, sender=FieldConditional)
+def invalidate_routing_table(sender, instance, **kwargs):
+    RoutingTable.invalidate(instance.form_id)
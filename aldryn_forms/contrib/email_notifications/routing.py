@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+
+from django.core.cache import cache
+
+from aldryn_forms.constants import ROUTING_TABLE_CACHE_TIMEOUT
+from aldryn_forms.validators import is_valid_recipient
+
+
+# conditionals with these actions are only routed to valid recipients.
+EMAIL_ACTION_TYPES = ('email', 'redirect-email')
+
+
+class RoutingTable(object):
+    """
+    The conditionals of a form compiled into a
+    field name -> field value -> [route] lookup.
+
+    A route holds the conditional's pk, field name, field value,
+    action type and action value.
+    The compiled table only holds plain python types so it can be
+    stored as is in the cache.
+    """
+
+    def __init__(self, routes):
+        self.routes = routes
+
+    @staticmethod
+    def get_cache_key(form_id):
+        return 'aldryn-forms-routing-table-%s' % form_id
+
+    @classmethod
+    def compile(cls, conditionals):
+        routes = {}
+
+        for conditional in conditionals:
+            action_type = conditional.action_type
+            action_value = conditional.action_value
+
+            if action_type in EMAIL_ACTION_TYPES and not is_valid_recipient(action_value):
+                continue
+
+            routes_by_value = routes.setdefault(conditional.field_name, {})
+            routes_by_value.setdefault(conditional.field_value, []).append(
+                (
+                    conditional.pk,
+                    conditional.field_name,
+                    conditional.field_value,
+                    action_type,
+                    action_value,
+                )
+            )
+        return cls(routes)
+
+    @classmethod
+    def for_form(cls, form_plugin):
+        key = cls.get_cache_key(form_plugin.pk)
+        routes = cache.get(key)
+
+        if routes is None:
+            table = cls.compile(form_plugin.conditionals.order_by('pk'))
+            cache.set(key, table.routes, ROUTING_TABLE_CACHE_TIMEOUT)
+        else:
+            table = cls(routes)
+        return table
+
+    @classmethod
+    def invalidate(cls, form_id):
+        cache.delete(cls.get_cache_key(form_id))
+
+    def match(self, form_data):
+        """
+        Returns the routes matching the submitted data, in the order
+        the conditionals were created.
+        """
+        matches = set()
+
+        for field_name, routes_by_value in self.routes.items():
+            value = form_data.get(field_name)
+
+            if not value:
+                continue
+
+            # multiple choice values are serialized as "one, two"
+            for field_value in value.split(', '):
+                matches.update(routes_by_value.get(field_value, ()))
+        return sorted(matches)
+
+    def resolve(self, form_plugin, form_data):
+        """
+        Returns the matching conditionals grouped by action type.
+        """
+        conditional_model = form_plugin.conditionals.model
+        conditionals = defaultdict(list)
+
+        for pk, field_name, field_value, action_type, action_value in self.match(form_data):
+            conditional = conditional_model(
+                pk=pk,
+                field_name=field_name,
+                field_value=field_value,
+                action_type=action_type,
+                action_value=action_value,
+            )
+            # avoid a query per conditional when preparing emails.
+            conditional.form = form_plugin
+            conditionals[action_type].append(conditional)
+        return conditionals
@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+import time
+
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.html import format_html
+from django.utils.module_loading import import_string
+from django.utils.safestring import mark_safe
+
+from .constants import (
+    HONEYPOT_FIELD,
+    MIN_FILL_TIME,
+    RATE_LIMITS,
+    SUBMISSION_BUCKET_RATE,
+    SUBMISSION_BUCKET_SIZE,
+    SUBMISSION_FILTERS,
+)
+from .instrumentation import get_timer
+from .middleware import get_marker, register_marker, use_request_markers
+
+logger = logging.getLogger(__name__)
+
+
+class SubmissionRejected(Exception):
+
+    def __init__(self, reason, status=400):
+        super(SubmissionRejected, self).__init__(reason)
+        self.reason = reason
+        self.status = status
+
+
+def get_client_ip(request):
+    return request.META.get('REMOTE_ADDR') or ''
+
+
+class BaseSubmissionFilter(object):
+    """
+    Checks a submission before its form is built,
+    raising SubmissionRejected for junk.
+    """
+
+    def render(self, instance, request):
+        """
+        Returns the html the filter adds to the form.
+        """
+        return ''
+
+    def check(self, instance, request):
+        raise NotImplementedError  # pragma: no cover
+
+
+class HoneypotFilter(BaseSubmissionFilter):
+    """
+    Rejects submissions filling in a field people don't see.
+    """
+    field_name = HONEYPOT_FIELD
+
+    def render(self, instance, request):
+        return format_html(
+            '<div style="position: absolute; left: -10000px;" aria-hidden="true">'
+            '<input type="text" name="{}" value="" tabindex="-1" autocomplete="off">'
+            '</div>',
+            self.field_name,
+        )
+
+    def check(self, instance, request):
+        if request.POST.get(self.field_name):
+            raise SubmissionRejected('honeypot')
+
+
+class FillTimeFilter(BaseSubmissionFilter):
+    """
+    Rejects submissions sent sooner than min_fill_time seconds
+    after the form was rendered.
+    """
+    field_name = 'aldryn_forms_rendered'
+    salt = 'aldryn_forms.filters.FillTimeFilter'
+    min_fill_time = MIN_FILL_TIME
+
+    def get_signer(self):
+        return signing.TimestampSigner(salt=self.salt)
+
+    def get_value(self):
+        return self.get_signer().sign('form')
+
+    def render(self, instance, request):
+        if use_request_markers(request):
+            value = get_marker('rendered')
+        else:
+            value = self.get_value()
+        return format_html('<input type="hidden" name="{}" value="{}">', self.field_name, value)
+
+    def check(self, instance, request):
+        value = request.POST.get(self.field_name) or ''
+
+        try:
+            self.get_signer().unsign(value, max_age=self.min_fill_time)
+        except signing.SignatureExpired:
+            # filled in slower than the minimum
+            return
+        except signing.BadSignature:
+            raise SubmissionRejected('fill time missing')
+        raise SubmissionRejected('filled in too fast')
+
+
+class TokenBucketFilter(BaseSubmissionFilter):
+    """
+    Allows each client ip bursts of bucket_size submissions,
+    refilled at rate submissions per second.
+    The bucket is read and written without a lock, concurrent
+    submissions may share a token, which is fine for shedding load.
+    """
+    bucket_size = SUBMISSION_BUCKET_SIZE
+    rate = SUBMISSION_BUCKET_RATE
+
+    def get_cache_key(self, request):
+        return 'aldryn-forms:bucket:{}'.format(get_client_ip(request))
+
+    def check(self, instance, request):
+        key = self.get_cache_key(request)
+        now = time.time()
+        tokens, updated = cache.get(key) or (self.bucket_size, now)
+        tokens = min(self.bucket_size, tokens + (now - updated) * self.rate)
+
+        if tokens < 1:
+            cache.set(key, (tokens, now), int(self.bucket_size / self.rate) + 1)
+            raise SubmissionRejected('too many submissions', status=429)
+        cache.set(key, (tokens - 1, now), int(self.bucket_size / self.rate) + 1)
+
+
+class WindowCounter(object):
+    """
+    Counts hits per fixed window in the cache, falling back
+    to counting in this process if the cache can't increment.
+    """
+
+    def __init__(self):
+        self.local = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key in self.local:
+                # the cache couldn't count this window, it may hold stale values.
+                count, expires = self.local[key]
+                return count if expires >= time.time() else 0
+
+        try:
+            return cache.get(key) or 0
+        except Exception:
+            return 0
+
+    def incr(self, key, timeout):
+        try:
+            cache.add(key, 0, timeout)
+            return cache.incr(key)
+        except Exception:
+            # no shared cache, or one without atomic increments.
+            return self.incr_local(key, timeout)
+
+    def incr_local(self, key, timeout):
+        now = time.time()
+
+        with self.lock:
+            count, expires = self.local.get(key, (0, 0))
+
+            if expires < now:
+                count, expires = 0, now + timeout
+
+            self.local[key] = (count + 1, expires)
+
+            if len(self.local) > 10000:
+                self.local = dict(
+                    (k, v) for k, v in self.local.items() if v[1] >= now
+                )
+            return count + 1
+
+
+class RateLimitFilter(BaseSubmissionFilter):
+    """
+    Limits submissions per form, client ip and session
+    over a sliding window, see ALDRYN_FORMS_RATE_LIMITS.
+
+    The window is approximated from the counts of the current
+    and the previous fixed window, weighting the previous one
+    by how much of it still overlaps the sliding window.
+    """
+    rate_limits = RATE_LIMITS
+    scopes = ('form', 'ip', 'session')
+    counter = WindowCounter()
+
+    def __init__(self, rate_limits=None):
+        if rate_limits is not None:
+            self.rate_limits = rate_limits
+
+        unknown = sorted(set(self.rate_limits) - set(self.scopes))
+
+        if unknown:
+            raise ImproperlyConfigured(
+                'Invalid settings.ALDRYN_FORMS_RATE_LIMITS. Unknown scopes: {}.'.format(', '.join(unknown))
+            )
+
+    def get_identity(self, scope, instance, request):
+        if scope == 'form':
+            return str(instance.pk)
+        if scope == 'ip':
+            return get_client_ip(request)
+        session = getattr(request, 'session', None)
+        return session.session_key if session is not None else None
+
+    def get_rate(self, scope, identity, limit, window):
+        now = time.time()
+        current = int(now // window)
+        key = 'aldryn-forms:rate:{}:{}:{}'.format(scope, identity, '{}')
+        count = self.counter.incr(key.format(current), window * 2)
+        previous = self.counter.get(key.format(current - 1))
+        overlap = 1 - (now % window) / window
+        return previous * overlap + count
+
+    def check(self, instance, request):
+        for scope, (limit, window) in self.rate_limits.items():
+            identity = self.get_identity(scope, instance, request)
+
+            if not identity:
+                continue
+
+            if self.get_rate(scope, identity, limit, window) > limit:
+                raise SubmissionRejected('{} rate limit'.format(scope), status=429)
+
+
+def rendered_marker(request):
+    return FillTimeFilter().get_value()
+
+
+register_marker('rendered', rendered_marker)
+
+
+_filters = None
+
+
+def get_submission_filters():
+    global _filters
+
+    if _filters is None:
+        _filters = [import_string(path)() for path in SUBMISSION_FILTERS]
+
+        if RATE_LIMITS and not any(isinstance(f, RateLimitFilter) for f in _filters):
+            _filters.insert(0, RateLimitFilter())
+    return _filters
+
+
+def render_submission_filters(instance, request):
+    html = ''.join(f.render(instance, request) for f in get_submission_filters())
+    return mark_safe(html)
+
+
+def run_submission_filters(instance, request):
+    """
+    Raises SubmissionRejected if any of the configured filters rejects
+    the submission. Runs once per request.
+    """
+    if getattr(request, '_aldryn_forms_filtered', False):
+        return
+
+    with get_timer(request).phase('filters'):
+        for submission_filter in get_submission_filters():
+            try:
+                submission_filter.check(instance, request)
+            except SubmissionRejected as e:
+                logger.info(
+                    'Rejected submission of form %s from %s: %s',
+                    instance.pk, get_client_ip(request), e.reason,
+                )
+                raise
+    request._aldryn_forms_filtered = True
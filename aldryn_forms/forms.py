@@ -1,17 +1,25 @@
 # -*- coding: utf-8 -*-
+from collections import OrderedDict
+
 from PIL import Image
 
 from django import forms
 from django.conf import settings
 from django.forms.forms import NON_FIELD_ERRORS
+from django.forms.utils import ErrorDict, ErrorList
 from django.utils.translation import gettext, gettext_lazy as _
 
-from .models import FormSubmission, FormPlugin
+from .helpers import inspect_upload
+from .idempotency import new_submission_key
+from .instrumentation import get_timer
+from .models import FormSubmission, FormPlugin, SerializedFormField
 from .utils import add_form_error, get_user_model
 from .constants import (
     DEFAULT_ACTION_BACKEND,
-    FORM_CUSTOM_FIELDS
+    FORM_CUSTOM_FIELDS,
+    SUBMISSION_SPOOL,
 )
+from .spool import get_spool
 
 try:
     from js_custom_fields.forms import CustomFieldsFormMixin
@@ -50,30 +58,56 @@ class FileSizeCheckMixin(object):
         return data
 
 
+def check_decompression_bomb(field, uploaded_file):
+    try:
+        inspect_upload(uploaded_file)
+    except Image.DecompressionBombError:
+        raise forms.ValidationError(
+            field.error_messages['decompression_bomb'],
+            code='decompression_bomb',
+        )
+
+
 class RestrictedFileField(FileSizeCheckMixin, forms.FileField):
-    pass
+    default_error_messages = {
+        'decompression_bomb': _('The uploaded image is too large to be processed.'),
+    }
+
+    def to_python(self, data):
+        f = super(RestrictedFileField, self).to_python(data)
+
+        if f is not None:
+            # stored as images, these would be decoded for thumbnails.
+            check_decompression_bomb(self, f)
+        return f
 
 
 class RestrictedImageField(FileSizeCheckMixin, forms.ImageField):
+    default_error_messages = {
+        'decompression_bomb': _('The uploaded image is too large to be processed.'),
+    }
 
     def __init__(self, *args, **kwargs):
         self.max_width = kwargs.pop('max_width', None)
         self.max_height = kwargs.pop('max_height', None)
         super(RestrictedImageField, self).__init__(*args, **kwargs)
 
+    def to_python(self, data):
+        f = forms.FileField.to_python(self, data)
+
+        if f is None:
+            return None
+        check_decompression_bomb(self, f)
+        # decodes the image to make sure it's not truncated or corrupt.
+        return super(RestrictedImageField, self).to_python(data)
+
     def clean(self, *args, **kwargs):
         data = super(RestrictedImageField, self).clean(*args, **kwargs)
 
         if data is None or not any([self.max_width, self.max_height]):
             return data
 
-        if hasattr(data, 'image'):
-            # Django >= 1.8
-            width, height = data.image.size
-        else:
-            width, height = Image.open(data).size
-            # cleanup after ourselves
-            data.seek(0)
+        width, height = inspect_upload(data).size
 
         if self.max_width and width > self.max_width:
             raise forms.ValidationError(
@@ -98,7 +132,59 @@ class RestrictedImageField(FileSizeCheckMixin, forms.ImageField):
         return data
 
 
-class FormSubmissionBaseForm(forms.Form):
+# how expensive validating a field is, see FormSubmissionBaseForm._clean_fields
+VALIDATION_CHEAP = 0
+# reads or decodes uploaded files, hits the database
+VALIDATION_IO = 1
+# calls an external service
+VALIDATION_NETWORK = 2
+
+VALIDATION_PHASES = {
+    VALIDATION_CHEAP: 'validation.cheap',
+    VALIDATION_IO: 'validation.io',
+    VALIDATION_NETWORK: 'validation.network',
+}
+
+
+def get_validation_cost(field):
+    plugin = getattr(field, '_plugin_instance', None)
+    return getattr(plugin, 'validation_cost', VALIDATION_CHEAP)
+
+
+class SubmissionFormMixin(object):
+    """
+    What action backends use of a submitted form,
+    built on top of get_serialized_fields.
+    """
+
+    def get_serialized_field_choices(self, is_confirmation=False):
+        """Renders the form data in a format suitable to be serialized.
+        """
+        fields = self.get_serialized_fields(is_confirmation)
+        fields = [(field.label, field.value) for field in fields]
+        return fields
+
+    def get_serialized_field_dict(self, is_confirmation=False):
+        fields = self.get_serialized_fields(is_confirmation)
+        fields = [(field.name, field.value) for field in fields]
+        return dict(fields)
+
+    def get_cleaned_data(self, is_confirmation=False):
+        fields = self.get_serialized_fields(is_confirmation)
+        form_data = dict((field.name, field.value) for field in fields)
+        return form_data
+
+    def save(self, commit=False):
+        self.instance.set_form_data(self)
+
+        if SUBMISSION_SPOOL:
+            # written to the database later, see aldryn_forms.spool
+            get_spool().append(self.instance)
+        else:
+            self.instance.save()
+
+
+class FormSubmissionBaseForm(SubmissionFormMixin, forms.Form):
 
     # these fields are internal.
     # by default we ignore all hidden fields when saving form data to db.
@@ -107,6 +193,9 @@ class FormSubmissionBaseForm(forms.Form):
         widget=forms.HiddenInput()
     )
     form_plugin_id = forms.IntegerField(widget=forms.HiddenInput())
+    # tells repeated posts of the same rendered form apart from new ones,
+    # see aldryn_forms.idempotency
+    submission_key = forms.CharField(widget=forms.HiddenInput(), required=False)
 
     def __init__(self, *args, **kwargs):
         self.form_plugin = kwargs.pop('form_plugin')
@@ -121,6 +210,35 @@ class FormSubmissionBaseForm(forms.Form):
         )
         self.fields['language'].initial = language
         self.fields['form_plugin_id'].initial = self.form_plugin.pk
+        self.fields['submission_key'].initial = new_submission_key
+        # outcome of the earlier submission, if this one repeats it
+        self.submission_outcome = None
+        # filer files stored for this submission
+        self.stored_uploads = []
+
+    def _clean_fields(self):
+        """
+        Cleans the fields in order of validation cost, cheapest first.
+        Costlier fields are only validated if the cheaper ones passed,
+        so an invalid submission doesn't cost a captcha verification.
+        """
+        fields = self.fields
+        phases = {}
+        timer = get_timer(self.request)
+
+        for name, field in fields.items():
+            phases.setdefault(get_validation_cost(field), OrderedDict())[name] = field
+
+        try:
+            for cost in sorted(phases):
+                if self._errors:
+                    break
+                self.fields = phases[cost]
+
+                with timer.phase(VALIDATION_PHASES.get(cost, 'validation.other')):
+                    super(FormSubmissionBaseForm, self)._clean_fields()
+        finally:
+            self.fields = fields
 
     def _add_error(self, message, field=NON_FIELD_ERRORS):
         if not self._errors is None:
@@ -144,27 +262,6 @@ class FormSubmissionBaseForm(forms.Form):
             if serialized_field:
                 yield serialized_field
 
-    def get_serialized_field_choices(self, is_confirmation=False):
-        """Renders the form data in a format suitable to be serialized.
-        """
-        fields = self.get_serialized_fields(is_confirmation)
-        fields = [(field.label, field.value) for field in fields]
-        return fields
-
-    def get_serialized_field_dict(self, is_confirmation=False):
-        fields = self.get_serialized_fields(is_confirmation)
-        fields = [(field.name, field.value) for field in fields]
-        return dict(fields)
-
-    def get_cleaned_data(self, is_confirmation=False):
-        fields = self.get_serialized_fields(is_confirmation)
-        form_data = dict((field.name, field.value) for field in fields)
-        return form_data
-
-    def save(self, commit=False):
-        self.instance.set_form_data(self)
-        self.instance.save()
-
     def clean_recipients(self):
         recipients = self.cleaned_data['recipients']
         action_backend = self.cleaned_data['action_backend']
@@ -174,6 +271,54 @@ class FormSubmissionBaseForm(forms.Form):
         return recipients
 
 
+class DeferredSubmissionForm(SubmissionFormMixin):
+    """
+    Stands in for a validated form when its action backend runs
+    after the request, see aldryn_forms.tasks.
+    Only holds the serialized fields, which is all the bundled
+    backends need.
+    """
+
+    def __init__(self, form_plugin, request, payload):
+        self.form_plugin = form_plugin
+        self.request = request
+        self.payload = payload
+        self.cleaned_data = payload['cleaned_data']
+        self.errors = ErrorDict()
+        self.stored_uploads = []
+        self.instance = FormSubmission(
+            name=form_plugin.name,
+            language=form_plugin.language,
+            form_url=payload['form_url'],
+        )
+
+    @classmethod
+    def get_payload(cls, form):
+        """
+        Returns what needs to be kept of a validated form
+        to rebuild it later, as json serializable data.
+        """
+        fields = list(form.get_serialized_fields(is_confirmation=False))
+        return {
+            'form_url': form.instance.form_url,
+            'fields': [field._asdict() for field in fields],
+            'confirmation_fields': [
+                field._asdict() for field in form.get_serialized_fields(is_confirmation=True)
+            ],
+            'cleaned_data': dict((field.name, field.value) for field in fields),
+        }
+
+    def is_valid(self):
+        return not self.errors
+
+    def _add_error(self, message, field=NON_FIELD_ERRORS):
+        self.errors.setdefault(field, ErrorList()).append(message)
+
+    def get_serialized_fields(self, is_confirmation=False):
+        key = 'confirmation_fields' if is_confirmation else 'fields'
+        return [SerializedFormField(**field) for field in self.payload[key]]
+
+
 class ExtandableErrorForm(forms.ModelForm):
 
     def append_to_errors(self, field, message):
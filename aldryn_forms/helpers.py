@@ -1,4 +1,10 @@
 # -*- coding: utf-8 -*-
+from collections import namedtuple
+
+from PIL import Image
+
+
+UploadInfo = namedtuple('UploadInfo', ['is_image', 'format', 'size'])
 
 
 def get_user_name(user):
@@ -19,3 +25,37 @@ def is_form_element(plugin):
     is_orphan_plugin = cms_plugin.model != plugin.__class__
     is_element_subclass = issubclass(plugin.get_plugin_class(), FormElement)
     return (not is_orphan_plugin) and is_element_subclass
+
+
+def inspect_upload(uploaded_file):
+    """
+    Tells if the uploaded file is an image, and its format and dimensions,
+    reading only the header bytes. The result is kept on the file
+    so validation and saving don't open it again.
+    Raises Image.DecompressionBombError for images too large to decode.
+    """
+    try:
+        return uploaded_file.upload_info
+    except AttributeError:
+        pass
+
+    image = getattr(uploaded_file, 'image', None)
+
+    if image is not None:
+        # already opened by forms.ImageField
+        info = UploadInfo(is_image=True, format=image.format, size=image.size)
+    else:
+        try:
+            uploaded_file.seek(0)
+            # Image.open is lazy, it only parses the header.
+            with Image.open(uploaded_file) as img:
+                info = UploadInfo(is_image=True, format=img.format, size=img.size)
+        except Image.DecompressionBombError:
+            raise
+        except Exception:
+            info = UploadInfo(is_image=False, format=None, size=None)
+        finally:
+            uploaded_file.seek(0)
+
+    uploaded_file.upload_info = info
+    return info
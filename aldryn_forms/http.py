@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+import json
+import select
+import threading
+from http.client import HTTPConnection, HTTPSConnection
+from urllib.parse import urlencode, urlsplit
+
+
+class Response(object):
+
+    def __init__(self, status, headers, content):
+        self.status = status
+        self.headers = headers
+        self.content = content
+
+    @property
+    def ok(self):
+        return 200 <= self.status < 300
+
+    def json(self):
+        return json.loads(self.content.decode('utf-8'))
+
+
+def is_connection_dropped(connection):
+    """
+    An idle keep-alive socket turns readable once the server closed it.
+    Uses poll where there is one, select can't watch file descriptors
+    past FD_SETSIZE.
+    """
+    if hasattr(select, 'poll'):
+        poller = select.poll()
+        poller.register(connection.sock, select.POLLIN)
+        return bool(poller.poll(0))
+    # windows has no poll, but its select has no such limit.
+    readable, writable, errors = select.select([connection.sock], [], [], 0)
+    return bool(readable)
+
+
+class PooledHTTPClient(object):
+    """
+    A small http client keeping one keep-alive connection
+    per host and thread, so repeated calls to the same service
+    skip the tcp and tls handshakes.
+    """
+
+    def __init__(self, timeout=10):
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def get_connections(self):
+        try:
+            return self._local.connections
+        except AttributeError:
+            self._local.connections = {}
+            return self._local.connections
+
+    def get_connection(self, key):
+        connections = self.get_connections()
+        connection = connections.get(key)
+
+        if connection is None:
+            scheme, host, port = key
+            connection_class = HTTPSConnection if scheme == 'https' else HTTPConnection
+            connection = connections[key] = connection_class(host, port, timeout=self.timeout)
+        return connection
+
+    def close(self, key=None):
+        connections = self.get_connections()
+        keys = [key] if key else list(connections)
+
+        for key in keys:
+            connection = connections.pop(key, None)
+
+            if connection is not None:
+                connection.close()
+
+    def request(self, method, url, body=None, headers=None, timeout=None):
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = parts.path or '/'
+
+        if parts.query:
+            path += '?' + parts.query
+
+        timeout = self.timeout if timeout is None else timeout
+
+        while True:
+            connection = self.get_connection(key)
+
+            if connection.sock is not None and is_connection_dropped(connection):
+                self.close(key)
+                connection = self.get_connection(key)
+
+            reused = connection.sock is not None
+            connection.timeout = timeout
+
+            if reused:
+                connection.sock.settimeout(timeout)
+
+            try:
+                connection.request(method, path, body=body, headers=headers or {})
+            except (ConnectionResetError, BrokenPipeError):
+                self.close(key)
+
+                if not reused:
+                    raise
+                # the server dropped the idle connection before it got
+                # the request, retry on a new one.
+                continue
+            except Exception:
+                self.close(key)
+                raise
+
+            try:
+                # the server may have acted on the request by now,
+                # so failures from here on aren't retried.
+                response = connection.getresponse()
+                content = response.read()
+            except Exception:
+                self.close(key)
+                raise
+
+            if response.will_close:
+                self.close(key)
+            return Response(response.status, dict(response.getheaders()), content)
+
+    def post_form(self, url, data, timeout=None):
+        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+        return self.request('POST', url, urlencode(data).encode('utf-8'), headers, timeout)
+
+    def post_json(self, url, data, headers=None, timeout=None):
+        headers = dict(headers or {}, **{'Content-Type': 'application/json'})
+        return self.request('POST', url, json.dumps(data).encode('utf-8'), headers, timeout)
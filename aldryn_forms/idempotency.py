@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import re
+import uuid
+
+from django.core.cache import cache
+
+from .constants import SUBMISSION_KEY_TIMEOUT
+
+
+SUBMISSION_KEY_FIELD = 'submission_key'
+
+SUBMISSION_KEY_RE = re.compile(r'^[0-9a-f]{32}$')
+
+STATUS_PENDING = 'pending'
+STATUS_DONE = 'done'
+
+
+def new_submission_key():
+    return uuid.uuid4().hex
+
+
+def get_submission_key(request):
+    key = request.POST.get(SUBMISSION_KEY_FIELD) or ''
+    return key if SUBMISSION_KEY_RE.match(key) else None
+
+
+def get_payload_hash(request):
+    data = sorted(request.POST.lists())
+    files = sorted(
+        (name, [(uploaded_file.name, uploaded_file.size) for uploaded_file in uploaded_files])
+        for name, uploaded_files in request.FILES.lists()
+    )
+    return hashlib.sha1(repr((data, files)).encode('utf-8')).hexdigest()
+
+
+def get_cache_key(instance, request, key):
+    # a key sent again with other data is another submission.
+    return 'aldryn-forms:submission:{}:{}:{}'.format(instance.pk, key, get_payload_hash(request))
+
+
+def claim_submission(instance, request):
+    """
+    Claims the submission key sent with the request.
+    Returns None if this is the first submission with that key,
+    otherwise the outcome recorded for the first one, which
+    is still pending if it hasn't finished yet.
+    Submissions without a key are always processed, as are all
+    of them unless ALDRYN_FORMS_SUBMISSION_KEY_TIMEOUT is set.
+    """
+    key = get_submission_key(request)
+
+    if not key or not SUBMISSION_KEY_TIMEOUT:
+        return None
+
+    cache_key = get_cache_key(instance, request, key)
+    outcome = {'status': STATUS_PENDING}
+
+    if cache.add(cache_key, outcome, SUBMISSION_KEY_TIMEOUT):
+        return None
+    return cache.get(cache_key) or outcome
+
+
+def record_submission(instance, request, success_url=None):
+    key = get_submission_key(request)
+
+    if key and SUBMISSION_KEY_TIMEOUT:
+        outcome = {'status': STATUS_DONE, 'success_url': success_url}
+        cache.set(get_cache_key(instance, request, key), outcome, SUBMISSION_KEY_TIMEOUT)
+
+
+def release_submission(instance, request):
+    """
+    Forgets a submission which failed, so it can be sent again.
+    """
+    key = get_submission_key(request)
+
+    if key and SUBMISSION_KEY_TIMEOUT:
+        cache.delete(get_cache_key(instance, request, key))
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+import logging
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+from .constants import SLOW_SUBMISSION_THRESHOLD, STATSD_ADDRESS, STATSD_PREFIX
+from .signals import form_submission_timed
+
+logger = logging.getLogger(__name__)
+
+
+class SubmissionTimer(object):
+    """
+    Collects how long each phase of processing a submission took.
+    Phases with the same name add up, a phase nested in one of
+    the same name on the same thread isn't counted twice.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.lock = threading.Lock()
+        self.finished = False
+        # phases running on each thread, backends may run on workers.
+        self._local = threading.local()
+
+    def get_active_phases(self):
+        try:
+            return self._local.active
+        except AttributeError:
+            self._local.active = set()
+            return self._local.active
+
+    @contextmanager
+    def phase(self, name):
+        active = self.get_active_phases()
+
+        if name in active:
+            yield
+            return
+
+        active.add(name)
+        started = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            active.discard(name)
+
+            with self.lock:
+                self.phases[name] = self.phases.get(name, 0) + elapsed
+
+    def get_record(self, instance, form=None):
+        with self.lock:
+            phases = dict(self.phases)
+        return {
+            'form_id': instance.pk,
+            'form_name': instance.name,
+            'valid': form is not None and not form.errors,
+            'total': time.perf_counter() - self.started,
+            'phases': phases,
+        }
+
+    def finish(self, instance, request, form=None):
+        if self.finished:
+            return
+        self.finished = True
+        record = self.get_record(instance, form)
+        form_submission_timed.send(
+            sender=instance.__class__,
+            instance=instance,
+            request=request,
+            record=record,
+        )
+
+
+class NullTimer(object):
+
+    @contextmanager
+    def phase(self, name):
+        yield
+
+    def finish(self, instance, request, form=None):
+        pass
+
+
+null_timer = NullTimer()
+
+
+def get_timer(request):
+    """
+    Returns the timer of the submission the request sends,
+    started on first use.
+    """
+    if request is None:
+        return null_timer
+
+    try:
+        return request._aldryn_forms_timer
+    except AttributeError:
+        request._aldryn_forms_timer = SubmissionTimer()
+        return request._aldryn_forms_timer
+
+
+def format_record(record):
+    phases = ' '.join(
+        '{}={:.1f}ms'.format(name, seconds * 1000)
+        for name, seconds in sorted(record['phases'].items())
+    )
+    return 'form {} submission took {:.1f}ms: {}'.format(
+        record['form_id'], record['total'] * 1000, phases,
+    )
+
+
+def log_record(sender, record, **kwargs):
+    if SLOW_SUBMISSION_THRESHOLD is not None and record['total'] >= SLOW_SUBMISSION_THRESHOLD:
+        logger.warning('Slow %s', format_record(record), extra={'timing': record})
+    else:
+        logger.debug(format_record(record), extra={'timing': record})
+
+
+class StatsdEmitter(object):
+    """
+    Sends submission timings as statsd timers over udp,
+    one datagram per submission.
+    """
+
+    def __init__(self, address, prefix=STATSD_PREFIX):
+        host, port = address.rsplit(':', 1)
+        self.address = (host, int(port))
+        self.prefix = prefix
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def get_lines(self, record):
+        lines = ['{}.submission.total:{:.3f}|ms'.format(self.prefix, record['total'] * 1000)]
+
+        for name, seconds in sorted(record['phases'].items()):
+            lines.append('{}.submission.{}:{:.3f}|ms'.format(self.prefix, name, seconds * 1000))
+        return lines
+
+    def __call__(self, sender, record, **kwargs):
+        data = '\n'.join(self.get_lines(record)).encode('utf-8')
+
+        try:
+            self.socket.sendto(data, self.address)
+        except OSError:
+            # metrics are best effort.
+            logger.debug('Could not send submission timings to statsd.', exc_info=True)
+
+
+form_submission_timed.connect(log_record, dispatch_uid='aldryn_forms.instrumentation.log_record')
+
+if STATSD_ADDRESS:
+    statsd_emitter = StatsdEmitter(STATSD_ADDRESS)
+    form_submission_timed.connect(statsd_emitter, dispatch_uid='aldryn_forms.instrumentation.statsd')
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand, CommandError
+
+from aldryn_forms.constants import SUBMISSION_SPOOL
+from aldryn_forms.spool import get_spool
+
+
+class Command(BaseCommand):
+    help = 'Saves the form submissions waiting in ALDRYN_FORMS_SUBMISSION_SPOOL.'
+
+    def handle(self, *args, **options):
+        if not SUBMISSION_SPOOL:
+            raise CommandError('ALDRYN_FORMS_SUBMISSION_SPOOL is not set.')
+
+        flushed = get_spool().flush()
+        self.stdout.write('Saved {} form submissions.'.format(flushed))
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+import time
+
+from django.core.management.base import BaseCommand
+
+from aldryn_forms.tasks import process_tasks
+
+
+class Command(BaseCommand):
+    help = 'Runs the action backends of deferred form submissions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10)
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep waiting for new submissions instead of exiting.',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=1.0,
+            help='Seconds to wait when there was nothing to do.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = process_tasks(limit=options['batch_size'])
+
+            if options['verbosity'] > 1:
+                self.stdout.write('Processed {} form submissions.'.format(processed))
+
+            if not options['loop']:
+                break
+
+            if not processed:
+                time.sleep(options['sleep'])
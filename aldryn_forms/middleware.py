@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+import base64
+import json
+import re
+
+from django.middleware.csrf import get_token
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.html import escape
+
+from .idempotency import new_submission_key
+from .constants import (
+    CACHE_UNBOUND_FORMS,
+    ENABLE_LOCALSTORAGE_COOKIE,
+    ENABLE_LOCALSTORAGE_COOKIE_CONTAINS,
+)
+
+
+MARKER_PREFIX = 'aldryn-forms['
+
+MARKER_RE = re.compile(r'aldryn-forms\[(?P<name>\w+)(?::(?P<arg>[\w=-]*))?\]')
+
+BLOCK_MARKER_RE = re.compile(
+    r'<!--aldryn-forms\[(?P<name>\w+)\]-->(?P<content>.*?)<!--/aldryn-forms\[(?P=name)\]-->',
+    re.DOTALL,
+)
+
+# value markers: name -> callable(request, arg) returning the html to insert.
+_value_markers = {}
+
+# block markers: name -> callable(request) telling if the block is kept.
+_block_markers = {}
+
+
+def register_marker(name, func):
+    _value_markers[name] = func
+
+
+def register_block_marker(name, func):
+    _block_markers[name] = func
+
+
+def get_marker(name, *args):
+    """
+    Returns a placeholder for a per request value.
+    Arguments are json encoded so they survive html escaping as is.
+    """
+    if not args:
+        return 'aldryn-forms[%s]' % name
+    arg = base64.urlsafe_b64encode(json.dumps(args).encode('utf-8'))
+    return 'aldryn-forms[%s:%s]' % (name, arg.decode('ascii'))
+
+
+def get_block_markers(name):
+    return (
+        '<!--aldryn-forms[%s]-->' % name,
+        '<!--/aldryn-forms[%s]-->' % name,
+    )
+
+
+def decode_marker_arg(arg):
+    if not arg:
+        return []
+    return json.loads(base64.urlsafe_b64decode(arg.encode('ascii')).decode('utf-8'))
+
+
+def use_request_markers(request):
+    """
+    Unbound forms are rendered with markers instead of per request values
+    only if the middleware is there to replace them.
+    """
+    if not CACHE_UNBOUND_FORMS or request.method != 'GET':
+        return False
+    return getattr(request, '_aldryn_forms_markers', False)
+
+
+def replace_markers(request, content):
+    def replace_block(match):
+        keep = _block_markers.get(match.group('name'))
+
+        if keep is None:
+            return match.group(0)
+        return match.group('content') if keep(request) else ''
+
+    def replace_value(match):
+        func = _value_markers.get(match.group('name'))
+
+        if func is None:
+            return match.group(0)
+        return func(request, *decode_marker_arg(match.group('arg')))
+
+    content = BLOCK_MARKER_RE.sub(replace_block, content)
+    return MARKER_RE.sub(replace_value, content)
+
+
+def csrf_token_marker(request):
+    return get_token(request)
+
+
+def request_value_marker(request, name, default):
+    return escape(request.GET.get(name, default))
+
+
+def submission_key_marker(request):
+    return new_submission_key()
+
+
+def localstorage_marker(request):
+    cookie = request.COOKIES.get(ENABLE_LOCALSTORAGE_COOKIE)
+    return cookie is not None and ENABLE_LOCALSTORAGE_COOKIE_CONTAINS in cookie
+
+
+register_marker('csrf', csrf_token_marker)
+register_marker('get', request_value_marker)
+register_marker('submission_key', submission_key_marker)
+register_block_marker('localstorage', localstorage_marker)
+
+
+class FormCacheMiddleware(MiddlewareMixin):
+    """
+    Fills in the per request values of forms rendered from the
+    placeholder cache (see ALDRYN_FORMS_CACHE_UNBOUND_FORMS).
+
+    Needs to come after CsrfViewMiddleware so the csrf cookie
+    gets set for the tokens inserted here.
+    """
+
+    def process_request(self, request):
+        request._aldryn_forms_markers = True
+
+    def process_response(self, request, response):
+        if response.streaming or 'text/html' not in response.get('Content-Type', ''):
+            return response
+
+        content = response.content.decode(response.charset)
+
+        if MARKER_PREFIX not in content:
+            return response
+
+        response.content = replace_markers(request, content)
+
+        if response.has_header('Content-Length'):
+            response['Content-Length'] = str(len(response.content))
+        return response
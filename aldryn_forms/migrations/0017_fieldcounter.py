@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aldryn_forms', '0016_auto_20200924_0952'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FieldCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Field counter',
+                'verbose_name_plural': 'Field counters',
+            },
+        ),
+    ]
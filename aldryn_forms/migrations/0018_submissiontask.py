@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aldryn_forms', '0017_fieldcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionTask',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payload', models.TextField(editable=False)),
+                ('status', models.CharField(choices=[('pending', 'pending'), ('running', 'running'), ('failed', 'failed')], default='pending', max_length=10, verbose_name='status')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='attempts')),
+                ('last_error', models.TextField(blank=True, verbose_name='last error')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('run_after', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('form', models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='submission_tasks', to='aldryn_forms.FormPlugin')),
+            ],
+            options={
+                'ordering': ['run_after'],
+                'verbose_name': 'Submission task',
+                'verbose_name_plural': 'Submission tasks',
+            },
+        ),
+    ]
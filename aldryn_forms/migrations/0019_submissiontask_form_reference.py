@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aldryn_forms', '0018_submissiontask'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='submissiontask',
+            name='form',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='submission_tasks', to='aldryn_forms.FormPlugin'),
+        ),
+        migrations.AddField(
+            model_name='submissiontask',
+            name='form_name',
+            field=models.CharField(default='', editable=False, max_length=255, verbose_name='form name'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='submissiontask',
+            name='form_language',
+            field=models.CharField(default='', editable=False, max_length=15),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='submissiontask',
+            name='form_placeholder',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aldryn_forms', '0019_submissiontask_form_reference'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='formsubmission',
+            name='spool_key',
+            field=models.CharField(editable=False, max_length=32, null=True, unique=True),
+        ),
+    ]
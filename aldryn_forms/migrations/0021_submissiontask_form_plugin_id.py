@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+from django.db import migrations, models
+
+
+def copy_form_plugin_ids(apps, schema_editor):
+    SubmissionTask = apps.get_model('aldryn_forms', 'SubmissionTask')
+    # tasks which already lost their form can't run anymore.
+    SubmissionTask.objects.filter(form__isnull=True).update(status='failed')
+
+    for task in SubmissionTask.objects.filter(form__isnull=False):
+        task.form_plugin_id = task.form_id
+        task.save(update_fields=['form_plugin_id'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aldryn_forms', '0020_formsubmission_spool_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submissiontask',
+            name='form_plugin_id',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_form_plugin_ids, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='submissiontask',
+            name='form',
+        ),
+        migrations.RemoveField(
+            model_name='submissiontask',
+            name='form_language',
+        ),
+        migrations.RemoveField(
+            model_name='submissiontask',
+            name='form_placeholder',
+        ),
+    ]
@@ -1,6 +1,7 @@
 from collections import defaultdict, namedtuple, OrderedDict
 from functools import partial
 import json
+import threading
 import warnings
 
 from cms.models.fields import PageField
@@ -8,12 +9,17 @@ from cms.models.pluginmodel import CMSPlugin
 #from cms.utils.plugins import build_plugin_tree, downcast_plugins
 from cms.utils.plugins import get_plugins_as_layered_tree, downcast_plugins
 from django.conf import settings
+from django.core.cache import cache
 try:
     from django.db.models import JSONField
 except ImportError:
     from django.contrib.postgres.fields import JSONField
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
 from django.db.models.functions import Coalesce
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
 from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 from djangocms_attributes_field.fields import AttributesField
@@ -28,8 +34,10 @@ except ImportError:
 
 
 
-from .helpers import is_form_element
+from .constants import COUNTER_BLOCK_SIZE, RECIPIENTS_CACHE_TIMEOUT
+from .helpers import get_user_name, is_form_element
 from .utils import ALDRYN_FORMS_ACTION_BACKEND_KEY_MAX_SIZE, action_backend_choices
+from .validators import is_valid_recipient
 
 AUTH_USER_MODEL = getattr(settings, 'AUTH_USER_MODEL', 'auth.User')
 
@@ -235,6 +243,27 @@ class BaseFormPlugin(CMSPlugin):
         for recipient in oldinstance.recipients.all():
             self.recipients.add(recipient)
 
+    @staticmethod
+    def get_recipients_cache_key(form_id):
+        return 'aldryn-forms-recipients-%s' % form_id
+
+    def get_notification_recipients(self):
+        """
+        Returns a (name, email) tuple for each recipient with a valid email.
+        The list is cached until the recipients or their details change.
+        """
+        key = self.get_recipients_cache_key(self.pk)
+        recipients = cache.get(key)
+
+        if recipients is None:
+            users = self.recipients.exclude(email='')
+            recipients = [
+                (get_user_name(user), user.email) for user in users.iterator()
+                if is_valid_recipient(user.email)
+            ]
+            cache.set(key, recipients, RECIPIENTS_CACHE_TIMEOUT)
+        return recipients
+
     def get_submit_button(self):
         from .cms_plugins import SubmitButton
 
@@ -338,7 +367,10 @@ class BaseFormPlugin(CMSPlugin):
         from .utils import get_nested_plugins
 
         if self.child_plugin_instances is None:
+            # the cms only sets the children while rendering,
+            # forms loaded on their own build the tree here.
             tree = self.get_tree(self)
+            self.child_plugin_instances = getattr(tree, 'child_plugin_instances', None) or []
             # descendants = self.get_descendants().order_by('path')
             # # Set parent_id to None in order to
             # # fool the build_plugin_tree function.
@@ -660,6 +692,8 @@ class FormSubmission(models.Model):
         blank=True,
     )
     sent_at = models.DateTimeField(auto_now_add=True)
+    # set for submissions saved from the spool, see aldryn_forms.spool
+    spool_key = models.CharField(max_length=32, unique=True, null=True, editable=False)
 
     class Meta:
         ordering = ['-sent_at']
@@ -723,3 +757,150 @@ class FormSubmission(models.Model):
         raw_recipients = [
             {'name': rec[0], 'email': rec[1]} for rec in recipients]
         self.recipients = json.dumps(raw_recipients)
+
+
+class SubmissionTask(models.Model):
+    """
+    A validated submission waiting for its action backend,
+    see aldryn_forms.tasks.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, _('pending')),
+        (STATUS_RUNNING, _('running')),
+        (STATUS_FAILED, _('failed')),
+    )
+
+    # no foreign key, the task keeps the pk of a removed form
+    # and fails instead of running without one.
+    form_plugin_id = models.PositiveIntegerField(editable=False, db_index=True)
+    form_name = models.CharField(
+        verbose_name=_('form name'),
+        max_length=255,
+        editable=False,
+    )
+    payload = models.TextField(editable=False)
+    status = models.CharField(
+        verbose_name=_('status'),
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+    )
+    attempts = models.PositiveIntegerField(verbose_name=_('attempts'), default=0)
+    last_error = models.TextField(verbose_name=_('last error'), blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # when the task may be picked up, next, as the lease of running tasks.
+    run_after = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ['run_after']
+        verbose_name = _('Submission task')
+        verbose_name_plural = _('Submission tasks')
+
+    def __str__(self):
+        return '{} ({})'.format(self.pk, self.status)
+
+    def get_payload(self):
+        return json.loads(self.payload)
+
+    def set_form(self, form_plugin):
+        self.form_plugin_id = form_plugin.pk
+        self.form_name = form_plugin.name
+
+    def get_form(self):
+        """
+        Returns the form plugin of the task, or None if it was removed.
+        """
+        return FormPlugin.objects.filter(pk=self.form_plugin_id).first()
+
+
+class FieldCounter(models.Model):
+    key = models.CharField(max_length=255, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    # key -> [next value, last value] of the block reserved by this process
+    _blocks = {}
+    _blocks_lock = threading.Lock()
+
+    class Meta:
+        verbose_name = _('Field counter')
+        verbose_name_plural = _('Field counters')
+
+    def __str__(self):
+        return self.key
+
+    @classmethod
+    def increment(cls, key, size=1, seed=None):
+        """
+        Atomically adds size to the counter and returns the new value.
+        The UPDATE locks the row until the transaction ends so concurrent
+        submissions never get the same value.
+        A missing counter starts from seed, which may be a callable.
+        """
+        counters = cls.objects.filter(key=key)
+
+        with transaction.atomic():
+            if not counters.update(value=F('value') + size):
+                initial = seed() if callable(seed) else seed
+
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(key=key, value=(initial or 0) + size)
+                except IntegrityError:
+                    # someone else created it in the meantime
+                    counters.update(value=F('value') + size)
+            return counters.values_list('value', flat=True).get()
+
+    @classmethod
+    def next_value(cls, key, seed=None):
+        """
+        Returns the next value of the counter.
+        With ALDRYN_FORMS_COUNTER_BLOCK_SIZE > 1 every process reserves
+        a block of values at once, values are then unique but not
+        handed out in submission order across processes.
+        """
+        if COUNTER_BLOCK_SIZE <= 1:
+            return cls.increment(key, seed=seed)
+
+        with cls._blocks_lock:
+            block = cls._blocks.get(key)
+
+            if block is None or block[0] > block[1]:
+                last = cls.increment(key, size=COUNTER_BLOCK_SIZE, seed=seed)
+                block = [last - COUNTER_BLOCK_SIZE + 1, last]
+                cls._blocks[key] = block
+
+            value = block[0]
+            block[0] += 1
+        return value
+
+
+def invalidate_recipients(form_ids):
+    keys = [BaseFormPlugin.get_recipients_cache_key(form_id) for form_id in form_ids]
+    cache.delete_many(keys)
+
+
+@receiver(m2m_changed, sender=FormPlugin.recipients.through)
+def invalidate_recipients_on_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if not reverse:
+        form_ids = [instance.pk]
+    elif pk_set:
+        form_ids = pk_set
+    else:
+        form_ids = FormPlugin.objects.filter(recipients=instance).values_list('pk', flat=True)
+    invalidate_recipients(form_ids)
+
+
+@receiver(post_save, sender=AUTH_USER_MODEL)
+@receiver(pre_delete, sender=AUTH_USER_MODEL)
+def invalidate_recipients_on_user_change(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not set(update_fields) & {'email', 'first_name', 'last_name'}:
+        # logins only update last_login
+        return
+    form_ids = FormPlugin.objects.filter(recipients=instance).values_list('pk', flat=True)
+    invalidate_recipients(form_ids)
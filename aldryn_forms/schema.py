@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django import forms
+
+from .constants import SCHEMA_CACHE_SIZE
+
+
+# (plugin class, form plugin pk) -> (version, schema), least recently used first.
+# publishing gives public plugins new pks, the stale entries fall out
+# once there are more than SCHEMA_CACHE_SIZE of them.
+_schemas = OrderedDict()
+_schemas_lock = threading.Lock()
+
+
+class FormSchema(object):
+    """
+    What an unbound form needs from the plugin tree: the dynamic form class
+    and the fields which take their initial value from the request.
+    """
+
+    def __init__(self, form_class, request_fields):
+        self.form_class = form_class
+        # list of (field name, default value)
+        self.request_fields = request_fields
+        # field name -> max upload size in bytes
+        self.upload_limits = dict(
+            (name, field.max_size) for name, field in form_class.base_fields.items()
+            if getattr(field, 'max_size', None)
+        )
+        # the most a valid submission can upload in total,
+        # None if a file field has no limit.
+        file_fields = [
+            name for name, field in form_class.base_fields.items()
+            if isinstance(field, forms.FileField)
+        ]
+
+        if all(name in self.upload_limits for name in file_fields):
+            self.upload_total_limit = sum(self.upload_limits[name] for name in file_fields)
+        else:
+            self.upload_total_limit = None
+
+
+def get_form_version(instance):
+    """
+    Changes whenever the form or any plugin nested in it is added,
+    changed, removed or moved. Moves and reorders are bulk updates
+    which don't touch changed_date, so the tree's shape is part of it.
+    """
+    children = instance.get_descendants().order_by('pk').values_list(
+        'pk', 'parent_id', 'position', 'changed_date',
+    )
+    digest = hashlib.sha1(repr(list(children)).encode('utf-8')).hexdigest()
+    return (instance.changed_date, digest)
+
+
+def get_form_schema(plugin, instance):
+    """
+    Returns the form schema of the given form plugin instance,
+    built once per process and form version.
+    """
+    key = (plugin.__class__, instance.pk)
+    version = get_form_version(instance)
+
+    with _schemas_lock:
+        cached_version, schema = _schemas.get(key, (None, None))
+
+        if schema is not None and cached_version == version:
+            _schemas.move_to_end(key)
+            return schema
+
+    schema = FormSchema(
+        form_class=plugin.get_form_class(instance),
+        request_fields=plugin.get_request_fields(instance),
+    )
+
+    with _schemas_lock:
+        _schemas[key] = (version, schema)
+        _schemas.move_to_end(key)
+
+        while len(_schemas) > SCHEMA_CACHE_SIZE:
+            _schemas.popitem(last=False)
+    return schema
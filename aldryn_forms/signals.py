@@ -3,3 +3,6 @@ from django.dispatch import Signal
 
 form_pre_save = Signal()
 form_post_save = Signal()
+# sent with the phase timings of every processed submission,
+# see aldryn_forms.instrumentation
+form_submission_timed = Signal()
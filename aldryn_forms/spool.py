@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from uuid import uuid4
+
+try:
+    import fcntl
+except ImportError:
+    # windows
+    fcntl = None
+    import msvcrt
+
+from django.db import connections, transaction
+
+from .constants import (
+    SUBMISSION_FLUSH_INTERVAL,
+    SUBMISSION_FLUSH_SIZE,
+    SUBMISSION_SPOOL,
+    SUBMISSION_SPOOL_FSYNC,
+)
+
+logger = logging.getLogger(__name__)
+
+# the FormSubmission fields kept in the spool
+SPOOLED_FIELDS = ('name', 'data', 'recipients', 'language', 'form_url')
+
+
+def lock_file(locked_file, blocking=True):
+    """
+    Takes an exclusive lock on the open file, returns False
+    if another process holds it and blocking is False.
+    """
+    if fcntl is not None:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+
+        try:
+            fcntl.flock(locked_file, flags)
+        except BlockingIOError:
+            return False
+        return True
+
+    while True:
+        locked_file.seek(0)
+
+        try:
+            msvcrt.locking(locked_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            if not blocking:
+                return False
+            time.sleep(0.01)
+        else:
+            return True
+
+
+def unlock_file(locked_file):
+    if fcntl is not None:
+        fcntl.flock(locked_file, fcntl.LOCK_UN)
+    else:
+        locked_file.seek(0)
+        msvcrt.locking(locked_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class SubmissionSpool(object):
+    """
+    An append only file of form submissions, written to in the request
+    and flushed to the database with bulk inserts by a background thread
+    every flush_interval milliseconds or flush_size submissions.
+
+    Spooled submissions get their sent_at date when they are flushed.
+    Each of them carries a key, so a file flushed again after a crash
+    doesn't save its submissions twice.
+    Writes reach the operating system before the request returns,
+    they are only synced to disk with fsync enabled.
+    """
+
+    def __init__(self, path, flush_interval=SUBMISSION_FLUSH_INTERVAL, flush_size=SUBMISSION_FLUSH_SIZE,
+                 fsync=SUBMISSION_SPOOL_FSYNC):
+        self.path = path
+        self.fsync = fsync
+        self.lock_path = path + '.lock'
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.pending = 0
+        self._flusher = None
+        self._flusher_lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+    @contextmanager
+    def locked(self):
+        # serializes writers across processes
+        with open(self.lock_path, 'a') as locked_file:
+            lock_file(locked_file)
+            try:
+                yield
+            finally:
+                unlock_file(locked_file)
+
+    def append(self, submission):
+        record = dict((name, getattr(submission, name)) for name in SPOOLED_FIELDS)
+        record['spool_key'] = uuid4().hex
+        line = json.dumps(record) + '\n'
+
+        with self.locked():
+            with open(self.path, 'a') as spool:
+                spool.write(line)
+                spool.flush()
+
+                if self.fsync:
+                    os.fsync(spool.fileno())
+
+        self.pending += 1
+        self.start_flusher()
+
+        if self.pending >= self.flush_size:
+            self._wakeup.set()
+
+    def claim(self):
+        """
+        Moves the spooled submissions aside and returns the paths
+        of all files waiting to be flushed.
+        """
+        with self.locked():
+            if os.path.exists(self.path) and os.path.getsize(self.path):
+                os.rename(self.path, '%s.%s.flushing' % (self.path, uuid4().hex))
+        return sorted(glob.glob(glob.escape(self.path) + '.*.flushing'))
+
+    def read(self, claimed):
+        records = []
+
+        for line in claimed:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # a write cut short by a crash
+                logger.error('Skipping unreadable spooled submission in %s.', claimed.name)
+        return records
+
+    def get_new_submissions(self, records):
+        """
+        Returns the submissions of the records, leaving out those
+        saved by an earlier flush which crashed before it was done.
+        """
+        from .models import FormSubmission
+
+        keys = [record['spool_key'] for record in records if record.get('spool_key')]
+        saved = set(
+            FormSubmission
+            .objects
+            .filter(spool_key__in=keys)
+            .values_list('spool_key', flat=True)
+        )
+        return [FormSubmission(**record) for record in records if record.get('spool_key') not in saved]
+
+    def flush(self):
+        """
+        Saves the spooled submissions, returns how many were saved.
+        """
+        from .models import FormSubmission
+
+        flushed = 0
+
+        for path in self.claim():
+            try:
+                claimed = open(path)
+            except FileNotFoundError:
+                continue
+
+            with claimed:
+                if not lock_file(claimed, blocking=False):
+                    # another process is flushing it
+                    continue
+
+                if not os.path.exists(path):
+                    # flushed while we were waiting for it
+                    continue
+
+                records = [record for record in self.read(claimed) if record]
+
+                with transaction.atomic():
+                    submissions = self.get_new_submissions(records)
+                    FormSubmission.objects.bulk_create(submissions, batch_size=self.flush_size)
+                os.remove(path)
+            flushed += len(submissions)
+        return flushed
+
+    def start_flusher(self):
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+
+        with self._flusher_lock:
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(
+                    target=self.run_flusher,
+                    name='aldryn-forms-submission-spool',
+                    daemon=True,
+                )
+                self._flusher.start()
+
+    def run_flusher(self):
+        while True:
+            self._wakeup.wait(self.flush_interval / 1000.0)
+            self._wakeup.clear()
+            self.pending = 0
+
+            try:
+                self.flush()
+            except Exception:
+                # the submissions stay in the spool for the next round
+                logger.exception('Could not flush spooled form submissions.')
+            finally:
+                connections.close_all()
+
+
+_spool = None
+
+
+def get_spool():
+    global _spool
+
+    if _spool is None:
+        _spool = SubmissionSpool(SUBMISSION_SPOOL)
+    return _spool
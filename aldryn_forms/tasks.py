@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection, connections, transaction
+from django.http import HttpRequest
+from django.utils import timezone
+
+from .constants import DEFERRED_ACTION_MAX_ATTEMPTS, DEFERRED_ACTION_WORKERS
+from .forms import DeferredSubmissionForm
+from .models import SubmissionTask
+from .utils import get_action_backends
+
+logger = logging.getLogger(__name__)
+
+# how long a worker may run a task before it's handed to another one
+TASK_LEASE = timedelta(minutes=10)
+
+# request headers kept to rebuild absolute urls in the worker
+REQUEST_META_KEYS = ('HTTP_HOST', 'SERVER_NAME', 'SERVER_PORT', 'REMOTE_ADDR', 'HTTP_USER_AGENT')
+
+
+class DeferredRequest(HttpRequest):
+    """
+    The parts of the submitting request an action backend may use.
+    Has no session or messages, messages must be sent with fail_silently.
+    """
+
+    def __init__(self, data):
+        super(DeferredRequest, self).__init__()
+        self.method = 'POST'
+        self.path = self.path_info = data['path']
+        self.META.update(data['meta'])
+        self.LANGUAGE_CODE = data['language']
+        self.user = AnonymousUser()
+        self._scheme = data['scheme']
+
+    def _get_scheme(self):
+        return self._scheme
+
+
+def get_request_data(request):
+    return {
+        'path': request.path,
+        'scheme': request.scheme,
+        'language': getattr(request, 'LANGUAGE_CODE', None),
+        'meta': dict((key, request.META[key]) for key in REQUEST_META_KEYS if key in request.META),
+    }
+
+
+def defer_submission(instance, request, form):
+    """
+    Records the validated submission for its action backend
+    to run outside of the request.
+    """
+    payload = {
+        'form': DeferredSubmissionForm.get_payload(form),
+        'request': get_request_data(request),
+    }
+    task = SubmissionTask(payload=json.dumps(payload))
+    task.set_form(instance)
+    task.save()
+
+    if DEFERRED_ACTION_WORKERS:
+        transaction.on_commit(lambda: get_executor().submit(run_worker_task, task.pk))
+    return task
+
+
+def claim_tasks(limit=10, task_ids=None):
+    """
+    Marks up to limit due tasks as running and returns them.
+    Running tasks whose lease expired are due again.
+    """
+    now = timezone.now()
+    tasks = SubmissionTask.objects.filter(
+        status__in=[SubmissionTask.STATUS_PENDING, SubmissionTask.STATUS_RUNNING],
+        run_after__lte=now,
+    )
+
+    if task_ids is not None:
+        tasks = tasks.filter(pk__in=task_ids)
+
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            tasks = tasks.select_for_update(skip_locked=True)
+        else:
+            tasks = tasks.select_for_update()
+
+        tasks = list(tasks.order_by('run_after')[:limit])
+
+        for task in tasks:
+            task.status = SubmissionTask.STATUS_RUNNING
+            task.attempts += 1
+            task.run_after = now + TASK_LEASE
+            task.save(update_fields=['status', 'attempts', 'run_after'])
+    return tasks
+
+
+def run_task(task):
+    """
+    Runs the action backend of the task's form.
+    Failed tasks are retried with an exponential backoff, and kept
+    as failed once they ran out of attempts.
+    """
+    form_plugin = task.get_form()
+
+    if form_plugin is None:
+        logger.error('Form "%s" of submission task %s no longer exists.', task.form_name, task.pk)
+        task.status = SubmissionTask.STATUS_FAILED
+        task.last_error = 'The form "{}" no longer exists.'.format(task.form_name)
+        task.save(update_fields=['status', 'last_error'])
+        return False
+
+    payload = task.get_payload()
+    form_plugin, plugin = form_plugin.get_plugin_instance()
+    request = DeferredRequest(payload['request'])
+    form = DeferredSubmissionForm(form_plugin, request, payload['form'])
+
+    try:
+        action_backend = get_action_backends()[form_plugin.action_backend]()
+        action_backend.form_valid(plugin, form_plugin, request, form)
+    except Exception:
+        logger.exception('Action backend of submission task %s failed.', task.pk)
+        return retry_task(task, traceback.format_exc())
+
+    if form.errors:
+        # the backend handled its failure itself, e.g. a rejected api call
+        logger.error('Action backend of submission task %s failed: %s', task.pk, form.errors.as_text())
+        return retry_task(task, form.errors.as_text())
+
+    task.delete()
+    return True
+
+
+def retry_task(task, error):
+    task.last_error = error
+
+    if task.attempts >= DEFERRED_ACTION_MAX_ATTEMPTS:
+        task.status = SubmissionTask.STATUS_FAILED
+    else:
+        task.status = SubmissionTask.STATUS_PENDING
+        task.run_after = timezone.now() + timedelta(seconds=30 * 2 ** task.attempts)
+    task.save(update_fields=['status', 'run_after', 'last_error'])
+    return False
+
+
+def process_tasks(limit=10, task_ids=None):
+    """
+    Claims and runs due tasks, returns how many succeeded.
+    """
+    return sum(run_task(task) for task in claim_tasks(limit, task_ids))
+
+
+def run_worker_task(task_id):
+    try:
+        process_tasks(task_ids=[task_id])
+    except Exception:
+        # the task stays due for the next worker
+        logger.exception('Could not run submission task %s.', task_id)
+    finally:
+        connections.close_all()
+
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=DEFERRED_ACTION_WORKERS,
+            thread_name_prefix='aldryn-forms-tasks',
+        )
+    return _executor
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+import hashlib
+
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from django.utils.translation import gettext
+
+from .constants import DEDUPLICATE_UPLOADS, MAX_UPLOAD_SIZE
+
+
+def format_size(size):
+    try:
+        from sizefield.utils import filesizeformat
+    except ImportError:
+        return size
+    return filesizeformat(size)
+
+
+class FormUploadHandler(FileUploadHandler):
+    """
+    Stops reading the request as soon as an uploaded file goes over the
+    max size of its form field, or all uploads go over the total the
+    form allows (the sum of its file fields' limits, capped by
+    ALDRYN_FORMS_MAX_UPLOAD_SIZE), instead of spooling the whole upload
+    before the form gets to reject it.
+
+    Under ASGI Django receives the whole body before any view runs,
+    there the limits only spare parsing and storing the files.
+    Limit the request size in the server or proxy in front of it.
+
+    With ALDRYN_FORMS_DEDUPLICATE_UPLOADS the sha1 of every file is
+    computed on the way, see get_upload_sha1.
+
+    Data is passed on untouched to the next upload handlers.
+    """
+
+    def __init__(self, request=None, max_sizes=None, max_total_size=MAX_UPLOAD_SIZE):
+        super(FormUploadHandler, self).__init__(request)
+        # field name -> max size in bytes
+        self.max_sizes = max_sizes or {}
+        self.max_total_size = max_total_size
+        self.total_size = 0
+        self.file_size = 0
+        # field name -> max size of the fields that were cut off
+        self.rejected_fields = {}
+        self.rejected_total = False
+        # field name -> sha1 of the received file
+        self.hashes = {}
+        self.hash = None
+
+    @property
+    def aborted(self):
+        return bool(self.rejected_fields) or self.rejected_total
+
+    def new_file(self, field_name, *args, **kwargs):
+        super(FormUploadHandler, self).new_file(field_name, *args, **kwargs)
+        self.file_size = 0
+        self.hash = hashlib.sha1() if DEDUPLICATE_UPLOADS else None
+
+    def receive_data_chunk(self, raw_data, start):
+        size = len(raw_data)
+        self.file_size += size
+        self.total_size += size
+
+        max_size = self.max_sizes.get(self.field_name)
+
+        if max_size is not None and self.file_size > max_size:
+            self.rejected_fields[self.field_name] = max_size
+            raise StopUpload(connection_reset=True)
+
+        if self.max_total_size is not None and self.total_size > self.max_total_size:
+            self.rejected_total = True
+            raise StopUpload(connection_reset=True)
+
+        if self.hash is not None:
+            self.hash.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.hash is not None:
+            self.hashes[self.field_name] = self.hash.hexdigest()
+        # the next handler builds the uploaded file
+        return None
+
+    def get_errors(self):
+        """
+        Returns the errors in the format of Form.errors.get_json_data().
+        """
+        errors = {}
+
+        for field_name, max_size in self.rejected_fields.items():
+            message = gettext('File size must be under %(max_size)s.') % {
+                'max_size': format_size(max_size),
+            }
+            errors[field_name] = [{'message': message, 'code': 'max_size'}]
+
+        if self.rejected_total:
+            message = gettext('The uploaded files must be under %(max_size)s in total.') % {
+                'max_size': format_size(self.max_total_size),
+            }
+            errors['__all__'] = [{'message': message, 'code': 'max_total_size'}]
+        return errors
+
+
+def get_total_limit(*limits):
+    limits = [limit for limit in limits if limit is not None]
+    return min(limits) if limits else None
+
+
+def receive_upload(request, max_sizes=None, max_total_size=None):
+    """
+    Reads the request body through a FormUploadHandler
+    and returns the handler.
+    """
+    max_total_size = get_total_limit(max_total_size, MAX_UPLOAD_SIZE)
+    handler = FormUploadHandler(request, max_sizes=max_sizes, max_total_size=max_total_size)
+    request.upload_handlers.insert(0, handler)
+
+    # parses the body
+    for field_name, uploaded_file in request.FILES.items():
+        if field_name in handler.hashes:
+            uploaded_file.sha1 = handler.hashes[field_name]
+    return handler
+
+
+def get_upload_sha1(uploaded_file):
+    """
+    Returns the sha1 of the uploaded file, as computed while
+    receiving it or by reading it now.
+    """
+    sha1 = getattr(uploaded_file, 'sha1', None)
+
+    if sha1 is None:
+        sha1 = hashlib.sha1()
+
+        for chunk in uploaded_file.chunks():
+            sha1.update(chunk)
+        sha1 = uploaded_file.sha1 = sha1.hexdigest()
+        uploaded_file.seek(0)
+    return sha1
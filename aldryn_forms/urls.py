@@ -1,9 +1,24 @@
 # -*- coding: utf-8 -*-
 from django.urls import re_path
 
-from .views import submit_form_view, submit_form_view_protect
+from .views import (
+    submit_form_async_view,
+    submit_form_json_view,
+    submit_form_view,
+    submit_form_view_protect,
+)
 
 urlpatterns = [
     re_path(r'^$', submit_form_view_protect, name='aldryn_forms_submit_form'),
     re_path(r'^exempt/$', submit_form_view, name='aldryn_forms_submit_form_exempt'),
+    re_path(
+        r'^submit/(?P<form_plugin_id>\d+)\.json$',
+        submit_form_json_view,
+        name='aldryn_forms_submit_form_json',
+    ),
+    re_path(
+        r'^async/(?P<form_plugin_id>\d+)\.json$',
+        submit_form_async_view,
+        name='aldryn_forms_submit_form_async',
+    ),
 ]
@@ -1,13 +1,15 @@
 from django.conf import settings
+from django.db import connections
 from django.core.exceptions import ImproperlyConfigured
 from django.forms.forms import NON_FIELD_ERRORS
 from django.utils.module_loading import import_string
 
+from asgiref.sync import sync_to_async
 from cms.models import CMSPlugin
 #from cms.utils.plugins import downcast_plugins, build_plugin_tree
 
 from .action_backends_base import BaseAction
-from .constants import ENABLE_API, CUSTOM_ACTION_BACKENDS
+from .constants import ENABLE_API, COMPOSITE_ACTION_BACKENDS, CUSTOM_ACTION_BACKENDS
 
 
 DEFAULT_ALDRYN_FORMS_ACTION_BACKENDS = {
@@ -18,6 +20,8 @@ DEFAULT_ALDRYN_FORMS_ACTION_BACKENDS = {
 if ENABLE_API:
     DEFAULT_ALDRYN_FORMS_ACTION_BACKENDS['email_api'] = 'aldryn_forms.action_backends.EmailAPIAction'
     DEFAULT_ALDRYN_FORMS_ACTION_BACKENDS['api_only'] = 'aldryn_forms.action_backends.APIAction'
+if COMPOSITE_ACTION_BACKENDS:
+    DEFAULT_ALDRYN_FORMS_ACTION_BACKENDS['composite'] = 'aldryn_forms.action_backends.CompositeAction'
 
 for key, value in CUSTOM_ACTION_BACKENDS.items():
     DEFAULT_ALDRYN_FORMS_ACTION_BACKENDS[key] = value
@@ -128,3 +132,17 @@ def add_form_error(form, message, field=NON_FIELD_ERRORS):
         form._errors[field].append(message)
     except KeyError:
         form._errors[field] = form.error_class([message])
+
+
+def run_in_thread(func):
+    """
+    Wraps func for async callers, running it on a thread of its own instead
+    of the shared sync thread. Meant for network bound work.
+    The thread's database connections are closed once func returns.
+    """
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            connections.close_all()
+    return sync_to_async(wrapper, thread_sensitive=False)
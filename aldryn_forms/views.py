@@ -1,26 +1,26 @@
 # -*- coding: utf-8 -*-
 from django.urls import reverse, resolve
-from django.http import HttpResponseRedirect, HttpResponseBadRequest
+from django.http import (
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseNotAllowed,
+    HttpResponseRedirect,
+    JsonResponse,
+)
 from django.shortcuts import render
+from django.middleware.csrf import CsrfViewMiddleware
 from django.views.decorators.csrf import csrf_exempt, csrf_protect
 
+from asgiref.sync import sync_to_async
 from cms.utils.page import get_page_from_request
 
+from .filters import SubmissionRejected, run_submission_filters
+from .idempotency import STATUS_DONE, STATUS_PENDING, new_submission_key
 from .models import FormPlugin
+from .uploadhandler import receive_upload
 
-@csrf_exempt
-def submit_form_view(request):
-    cms_page = get_page_from_request(request)
-
-    if not cms_page:
-        return HttpResponseBadRequest()
-
-    template = cms_page.get_template()
-
-    context = {
-        'current_app': resolve(request.path).namespace,
-        'current_page': cms_page,
-    }
+def render_submitted_form(request):
+    form_plugin = None
 
     if request.method == 'POST':
         form_plugin_id = request.POST.get('form_plugin_id') or ''
@@ -37,10 +37,35 @@ def submit_form_view(request):
         except FormPlugin.DoesNotExist:
             return HttpResponseBadRequest()
 
+        # junk is rejected before the page is looked up.
+        try:
+            run_submission_filters(form_plugin, request)
+        except SubmissionRejected as e:
+            return HttpResponse(status=e.status)
+
+    cms_page = get_page_from_request(request)
+
+    if not cms_page:
+        return HttpResponseBadRequest()
+
+    template = cms_page.get_template()
+
+    context = {
+        'current_app': resolve(request.path).namespace,
+        'current_page': cms_page,
+    }
+
+    if form_plugin is not None:
         form_plugin_instance = form_plugin.get_plugin_instance()[1]
         # saves the form if it's valid
         form = form_plugin_instance.process_form(form_plugin, request)
-        success_url = form_plugin_instance.get_success_url(instance=form_plugin)
+        outcome = getattr(form, 'submission_outcome', None)
+
+        if outcome and outcome['status'] == STATUS_DONE:
+            # a repeated post goes where the first one went.
+            success_url = outcome['success_url']
+        else:
+            success_url = form_plugin_instance.get_success_url(instance=form_plugin)
 
         if form.is_valid() and success_url:
             return HttpResponseRedirect(success_url)
@@ -61,6 +86,194 @@ def submit_form_view(request):
         
     return render(request, template, context)
 
-@csrf_protect
+@csrf_exempt
+def submit_form_view(request):
+    upload = receive_upload(request)
+
+    if upload.aborted:
+        return HttpResponse(status=413)
+    return render_submitted_form(request)
+
+
+@csrf_exempt
 def submit_form_view_protect(request):
-    return submit_form_view(request)
+    # the upload handler has to be in place before
+    # the csrf check reads the request body.
+    upload = receive_upload(request)
+
+    if upload.aborted:
+        return HttpResponse(status=413)
+    return csrf_protect(render_submitted_form)(request)
+
+
+def get_form_plugin(form_plugin_id):
+    """
+    Returns the form plugin instance and its plugin class instance,
+    or (None, None) if there's no such form.
+    """
+    try:
+        form_plugin = FormPlugin.objects.get(pk=form_plugin_id)
+    except FormPlugin.DoesNotExist:
+        return None, None
+    return form_plugin.get_plugin_instance()
+
+
+def set_form_plugin_id(request, form_plugin):
+    """
+    Makes sure the submitted data is bound to the form from the url.
+    Returns False if the data was meant for another form.
+    """
+    submitted_id = request.POST.get('form_plugin_id')
+
+    if submitted_id and submitted_id != str(form_plugin.pk):
+        return False
+
+    if not submitted_id:
+        # the url already says which form this is.
+        request.POST = request.POST.copy()
+        request.POST['form_plugin_id'] = str(form_plugin.pk)
+    return True
+
+
+def get_json_response(form_plugin, form_plugin_instance, form):
+    if not form.is_valid():
+        data = {
+            'success': False,
+            'errors': form.errors.get_json_data(),
+        }
+        return JsonResponse(data, status=400)
+
+    outcome = form.submission_outcome
+
+    if outcome and outcome['status'] == STATUS_PENDING:
+        # the first post of this submission is still being processed.
+        data = {
+            'success': False,
+            'errors': {},
+            'pending': True,
+        }
+        return JsonResponse(data, status=409)
+
+    if outcome:
+        success_url = outcome['success_url']
+    else:
+        success_url = form_plugin_instance.get_form_success_url(form_plugin, form)
+
+    data = {
+        'success': True,
+        'success_url': success_url or None,
+        # for the next submission of a form which stays on the page.
+        'submission_key': new_submission_key(),
+    }
+    return JsonResponse(data)
+
+
+def get_upload_error_response(upload):
+    data = {
+        'success': False,
+        'errors': upload.get_errors(),
+    }
+    return JsonResponse(data, status=413 if upload.rejected_total else 400)
+
+
+def get_rejected_response(error):
+    return JsonResponse({'success': False, 'errors': {}}, status=error.status)
+
+
+def check_csrf(request):
+    """
+    Returns the csrf failure response, if any.
+    """
+    middleware = CsrfViewMiddleware(lambda request: None)
+    middleware.process_request(request)
+    return middleware.process_view(request, None, (), {})
+
+
+@csrf_exempt
+def submit_form_json_view(request, form_plugin_id):
+    """
+    Validates and saves a form submitted via XHR and reports the outcome
+    as json, without rendering the page the form lives on.
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+
+    form_plugin, form_plugin_instance = get_form_plugin(form_plugin_id)
+
+    if form_plugin is None:
+        return JsonResponse({'success': False, 'errors': {}}, status=404)
+
+    # the upload handler has to be in place before
+    # the csrf check reads the request body.
+    schema = form_plugin_instance.get_form_schema(form_plugin)
+    upload = receive_upload(
+        request,
+        max_sizes=schema.upload_limits,
+        max_total_size=schema.upload_total_limit,
+    )
+
+    if upload.aborted:
+        return get_upload_error_response(upload)
+
+    csrf_failure = check_csrf(request)
+
+    if csrf_failure:
+        return csrf_failure
+
+    if not set_form_plugin_id(request, form_plugin):
+        return HttpResponseBadRequest()
+
+    try:
+        run_submission_filters(form_plugin, request)
+    except SubmissionRejected as e:
+        return get_rejected_response(e)
+
+    # saves the form if it's valid
+    form = form_plugin_instance.process_form(form_plugin, request)
+    return get_json_response(form_plugin, form_plugin_instance, form)
+
+
+async def submit_form_async_view(request, form_plugin_id):
+    """
+    Async variant of submit_form_json_view for ASGI deployments.
+    Network bound steps run on worker threads so they don't hold
+    the event loop (see FormPlugin.aprocess_form).
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+
+    form_plugin, form_plugin_instance = await sync_to_async(get_form_plugin)(form_plugin_id)
+
+    if form_plugin is None:
+        return JsonResponse({'success': False, 'errors': {}}, status=404)
+
+    schema = await sync_to_async(form_plugin_instance.get_form_schema)(form_plugin)
+    # parsing the multipart body is blocking work.
+    upload = await sync_to_async(receive_upload)(
+        request,
+        max_sizes=schema.upload_limits,
+        max_total_size=schema.upload_total_limit,
+    )
+
+    if upload.aborted:
+        return get_upload_error_response(upload)
+
+    csrf_failure = await sync_to_async(check_csrf)(request)
+
+    if csrf_failure:
+        return csrf_failure
+
+    if not set_form_plugin_id(request, form_plugin):
+        return HttpResponseBadRequest()
+
+    try:
+        await sync_to_async(run_submission_filters)(form_plugin, request)
+    except SubmissionRejected as e:
+        return get_rejected_response(e)
+
+    form = await form_plugin_instance.aprocess_form(form_plugin, request)
+    return await sync_to_async(get_json_response)(form_plugin, form_plugin_instance, form)
+
+
+# csrf_exempt doesn't wrap coroutines on all supported Django versions.
+submit_form_async_view.csrf_exempt = True
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for rendering, submitting and exporting forms.
+
+They are skipped unless ALDRYN_FORMS_BENCHMARKS is set:
+
+    ALDRYN_FORMS_BENCHMARKS=1 python setup.py test
+
+Each benchmark records the median wall time, the query count and the
+peak allocations. It fails if it runs more queries than its baseline in
+baselines.json or allocates more than the baseline times
+ALDRYN_FORMS_BENCHMARKS_TOLERANCE (1.25 by default).
+Wall time depends too much on the machine to gate on, so it is advisory:
+a run slower than the baseline times the tolerance only warns.
+ALDRYN_FORMS_BENCHMARKS_UPDATE=1 writes the measured values as the new
+baselines instead. Baselines are kept per database vendor, point
+DATABASE_URL at a postgres database to measure against it.
+"""
+import json
+import os
+import statistics
+import time
+import tracemalloc
+from collections import namedtuple
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+BENCHMARKS_ENABLED = bool(os.environ.get('ALDRYN_FORMS_BENCHMARKS'))
+
+UPDATE_BASELINES = bool(os.environ.get('ALDRYN_FORMS_BENCHMARKS_UPDATE'))
+
+TOLERANCE = float(os.environ.get('ALDRYN_FORMS_BENCHMARKS_TOLERANCE', 1.25))
+
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), 'baselines.json')
+
+
+Measurement = namedtuple('Measurement', ['wall', 'queries', 'allocated'])
+
+
+def measure(func, repeat=5):
+    """
+    Runs func once to warm caches, then repeat times measuring it.
+    Returns the median wall time in ms, the most queries of
+    a run and the peak allocations in KiB.
+    """
+    func()
+    walls, queries, peaks = [], [], []
+
+    for i in range(repeat):
+        with CaptureQueriesContext(connection) as context:
+            tracemalloc.start()
+            started = time.perf_counter()
+
+            try:
+                func()
+            finally:
+                walls.append((time.perf_counter() - started) * 1000)
+                peaks.append(tracemalloc.get_traced_memory()[1] / 1024.0)
+                tracemalloc.stop()
+        queries.append(len(context.captured_queries))
+    return Measurement(
+        wall=round(statistics.median(walls), 3),
+        queries=max(queries),
+        allocated=round(max(peaks), 1),
+    )
+
+
+def load_baselines():
+    with open(BASELINES_PATH) as baselines_file:
+        return json.load(baselines_file)
+
+
+def save_baselines(baselines):
+    with open(BASELINES_PATH, 'w') as baselines_file:
+        json.dump(baselines, baselines_file, indent=2, sort_keys=True)
+        baselines_file.write('\n')
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+import unittest
+import warnings
+
+from cms.api import add_plugin, create_page
+from cms.test_utils.testcases import CMSTestCase
+from django.contrib.auth.models import AnonymousUser, User
+from django.db import connection
+from django.test import RequestFactory
+
+from aldryn_forms.admin.exporter import Exporter
+from aldryn_forms.models import FormSubmission
+from aldryn_forms.views import submit_form_view
+
+from . import (
+    BENCHMARKS_ENABLED,
+    TOLERANCE,
+    UPDATE_BASELINES,
+    load_baselines,
+    measure,
+    save_baselines,
+)
+
+
+FORM_SIZES = (5, 50, 200)
+
+# every this many fields go into a fieldset, nested in an outer one
+FIELDSET_SIZE = 10
+
+SELECT_OPTIONS = 500
+
+EXPORTED_SUBMISSIONS = 200
+
+
+@unittest.skipUnless(BENCHMARKS_ENABLED, 'set ALDRYN_FORMS_BENCHMARKS to run the benchmarks')
+class FormBenchmarks(CMSTestCase):
+    results = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        super(FormBenchmarks, cls).tearDownClass()
+
+        for name, measurement in sorted(cls.results.items()):
+            print('{}: {wall}ms, {queries} queries, {allocated}KiB'.format(name, **measurement))
+
+        if UPDATE_BASELINES and cls.results:
+            baselines = load_baselines()
+            baselines.update(cls.results)
+            save_baselines(baselines)
+
+    def setUp(self):
+        super(FormBenchmarks, self).setUp()
+        self.factory = RequestFactory()
+        self.user = User.objects.create_superuser('username', 'email@example.com', 'password')
+
+    def create_form(self, size):
+        page = create_page('form {}'.format(size), 'test_page.html', 'en', published=True)
+        placeholder = page.placeholders.get(slot='content')
+        form_plugin = add_plugin(
+            placeholder, 'FormPlugin', 'en',
+            name='benchmark {}'.format(size),
+            action_backend='default',
+        )
+        form_plugin.recipients.add(self.user)
+        outer = add_plugin(placeholder, 'Fieldset', 'en', target=form_plugin, legend='outer')
+        fieldset = None
+
+        for i in range(size):
+            if i % FIELDSET_SIZE == 0:
+                fieldset = add_plugin(placeholder, 'Fieldset', 'en', target=outer, legend='group {}'.format(i))
+
+            if i % FIELDSET_SIZE == FIELDSET_SIZE - 1:
+                field = add_plugin(placeholder, 'SelectField', 'en', target=fieldset, label='select {}'.format(i))
+                for position in range(SELECT_OPTIONS):
+                    field.option_set.create(value='option {}'.format(position), position=position)
+            else:
+                add_plugin(placeholder, 'TextField', 'en', target=fieldset, label='text {}'.format(i))
+
+        add_plugin(placeholder, 'SubmitButton', 'en', target=form_plugin)
+        page.publish('en')
+        return page, form_plugin
+
+    def get_submission_data(self, form_plugin):
+        data = {
+            'form_plugin_id': str(form_plugin.pk),
+            'language': 'en',
+        }
+
+        for field in form_plugin.get_form_fields():
+            if field.plugin_instance.plugin_type == 'SelectField':
+                data[field.name] = str(field.plugin_instance.option_set.all()[0].pk)
+            else:
+                data[field.name] = 'value'
+        return data
+
+    def submit(self, page, data):
+        request = self.factory.post(page.get_absolute_url('en'), data)
+        request.user = AnonymousUser()
+        request.session = {}
+        return submit_form_view(request)
+
+    def check_baseline(self, name, measurement):
+        name = '{}:{}'.format(connection.vendor, name)
+        self.results[name] = measurement._asdict()
+        baseline = load_baselines().get(name)
+
+        if UPDATE_BASELINES or baseline is None:
+            return
+
+        self.assertLessEqual(
+            measurement.queries, baseline['queries'],
+            '{} ran {} queries, {} before'.format(name, measurement.queries, baseline['queries']),
+        )
+        self.assertLessEqual(
+            measurement.allocated, baseline['allocated'] * TOLERANCE,
+            '{} allocated {}KiB, {}KiB before'.format(name, measurement.allocated, baseline['allocated']),
+        )
+
+        if measurement.wall > baseline['wall'] * TOLERANCE:
+            warnings.warn('{} took {}ms, {}ms before'.format(name, measurement.wall, baseline['wall']))
+
+    def test_render(self):
+        for size in FORM_SIZES:
+            page, form_plugin = self.create_form(size)
+            url = page.get_absolute_url('en')
+
+            measurement = measure(lambda: self.client.get(url))
+            self.check_baseline('render.{}'.format(size), measurement)
+
+    def test_submit(self):
+        for size in FORM_SIZES:
+            page, form_plugin = self.create_form(size)
+            data = self.get_submission_data(form_plugin)
+
+            response = self.submit(page, data)
+            self.assertIn(response.status_code, (200, 302))
+
+            measurement = measure(lambda: self.submit(page, data))
+            self.check_baseline('submit.{}'.format(size), measurement)
+
+    def test_export(self):
+        for size in FORM_SIZES:
+            page, form_plugin = self.create_form(size)
+            self.submit(page, self.get_submission_data(form_plugin))
+            submission = FormSubmission.objects.filter(name=form_plugin.name).latest('pk')
+            FormSubmission.objects.bulk_create([
+                FormSubmission(
+                    name=submission.name,
+                    language=submission.language,
+                    form_url=submission.form_url,
+                    data=submission.data,
+                    recipients=submission.recipients,
+                )
+                for i in range(EXPORTED_SUBMISSIONS)
+            ])
+            queryset = FormSubmission.objects.filter(name=form_plugin.name)
+            exporter = Exporter(queryset)
+
+            measurement = measure(exporter.get_fields_for_export)
+            self.check_baseline('export_fields.{}'.format(size), measurement)
+
+            latest_fields, old_fields = exporter.get_fields_for_export()
+            field_ids = [field.field_id for field in latest_fields]
+
+            measurement = measure(lambda: exporter.get_dataset(field_ids))
+            self.check_baseline('export_dataset.{}'.format(size), measurement)
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+from django.utils import translation
+
+from aldryn_forms.action_backends import CompositeAction, EmailAction, NoAction
+
+
+class SlowAction(NoAction):
+    concurrent = True
+
+    def form_valid(self, cmsplugin, instance, request, form):
+        time.sleep(0.5)
+
+
+class FailingAction(NoAction):
+    concurrent = True
+
+    def form_valid(self, cmsplugin, instance, request, form):
+        raise ValueError('down')
+
+
+class ThreadAction(NoAction):
+
+    def form_valid(self, cmsplugin, instance, request, form):
+        return threading.current_thread()
+
+
+class LanguageAction(NoAction):
+    concurrent = True
+
+    def form_valid(self, cmsplugin, instance, request, form):
+        return translation.get_language()
+
+
+class CompositeActionTestCase(SimpleTestCase):
+
+    def get_action(self, **backends):
+        action = CompositeAction()
+        action.backends = list(backends)
+        action.timeout = 0.1
+        registry = dict((key, klass) for key, klass in backends.items())
+        patcher = mock.patch('aldryn_forms.action_backends.get_action_backends', return_value=registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return action
+
+    def test_failures_and_timeouts_are_isolated(self):
+        action = self.get_action(email=EmailAction, slow=SlowAction, failing=FailingAction)
+        cmsplugin = mock.Mock()
+        cmsplugin.send_notifications.return_value = ['a@example.com']
+
+        results = action.form_valid(cmsplugin, mock.Mock(), mock.Mock(), mock.Mock())
+
+        self.assertEquals([result.ok for result in results], [True, False, False])
+        cmsplugin.send_notifications.assert_called_once()
+        cmsplugin.send_success_message.assert_called_once()
+
+    def test_backends_share_one_deadline(self):
+        action = self.get_action(first=SlowAction, second=SlowAction, third=SlowAction)
+        start = time.monotonic()
+
+        results = action.form_valid(mock.Mock(), mock.Mock(), mock.Mock(), mock.Mock())
+
+        self.assertLess(time.monotonic() - start, 0.3)
+        self.assertEquals([result.ok for result in results], [False, False, False])
+
+    def test_composite_action_cant_run_itself(self):
+        action = self.get_action(email=EmailAction, composite=CompositeAction)
+
+        with self.assertRaises(ImproperlyConfigured):
+            action.form_valid(mock.Mock(), mock.Mock(), mock.Mock(), mock.Mock())
+
+    def test_backends_using_the_form_run_in_the_request(self):
+        action = self.get_action(first=ThreadAction, second=ThreadAction, slow=SlowAction)
+
+        results = action.form_valid(mock.Mock(), mock.Mock(), mock.Mock(), mock.Mock())
+
+        self.assertEquals([result.value for result in results[:2]], [threading.current_thread()] * 2)
+        self.assertFalse(results[2].ok)
+
+    def test_concurrent_backends_use_the_request_language(self):
+        action = self.get_action(language=LanguageAction)
+
+        with translation.override('de'):
+            results = action.form_valid(mock.Mock(), mock.Mock(), mock.Mock(), mock.Mock())
+
+        self.assertEquals(results[0].value, 'de')
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+import os
+import resource
+import socket
+import threading
+import unittest
+from http.client import RemoteDisconnected
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from aldryn_forms import api
+from aldryn_forms.http import PooledHTTPClient, Response, is_connection_dropped
+
+
+class PostTestCase(SimpleTestCase):
+
+    @mock.patch('aldryn_forms.api.client')
+    def test_returns_decoded_response(self, client):
+        client.post_json.return_value = Response(200, {}, b'{"id": 1}')
+
+        self.assertEquals(api.post('https://crm.example.com/leads', {}, concurrency=2), {'id': 1})
+
+    @mock.patch('aldryn_forms.api.client')
+    def test_server_errors_are_retryable(self, client):
+        client.post_json.return_value = Response(503, {}, b'')
+
+        with self.assertRaises(api.APIError) as context:
+            api.post('https://crm.example.com/leads', {})
+
+        self.assertEquals(context.exception.status, 503)
+        self.assertTrue(context.exception.retryable)
+
+    @mock.patch('aldryn_forms.api.client')
+    def test_client_errors_are_not_retryable(self, client):
+        client.post_json.return_value = Response(400, {}, b'')
+
+        with self.assertRaises(api.APIError) as context:
+            api.post('https://crm.example.com/leads', {})
+
+        self.assertFalse(context.exception.retryable)
+
+
+class MicroBatcherTestCase(SimpleTestCase):
+
+    def test_full_batch_is_sent_at_once(self):
+        send = mock.Mock(return_value=['a', 'b'])
+        batcher = api.MicroBatcher(send, size=2, wait=10)
+
+        first = batcher.submit(1)
+        second = batcher.submit(2)
+
+        send.assert_called_once_with([1, 2])
+        self.assertEquals(first.result(0), 'a')
+        self.assertEquals(second.result(0), 'b')
+
+    def test_partial_batch_is_sent_after_wait(self):
+        send = mock.Mock(return_value={'ok': True})
+        batcher = api.MicroBatcher(send, size=10, wait=0.01)
+
+        self.assertEquals(batcher.submit(1).result(1), {'ok': True})
+        send.assert_called_once_with([1])
+
+    def test_failures_reach_every_caller(self):
+        send = mock.Mock(side_effect=api.APIError('down', retryable=True))
+        batcher = api.MicroBatcher(send, size=2, wait=10)
+
+        futures = [batcher.submit(1), batcher.submit(2)]
+
+        for future in futures:
+            self.assertRaises(api.APIError, future.result, 0)
+
+    def test_partial_batches_are_sent_from_one_thread(self):
+        threads = []
+
+        def send(items):
+            threads.append(threading.current_thread())
+            return items
+
+        batcher = api.MicroBatcher(send, size=10, wait=0.01)
+
+        for item in range(3):
+            self.assertEquals(batcher.submit(item).result(1), item)
+
+        self.assertEquals(len(threads), 3)
+        self.assertEquals(len(set(threads)), 1)
+
+
+@mock.patch('aldryn_forms.http.is_connection_dropped', return_value=False)
+class PooledHTTPClientTestCase(SimpleTestCase):
+
+    def get_client(self, connection):
+        client = PooledHTTPClient()
+        client.get_connections()[('http', 'example.com', None)] = connection
+        return client
+
+    def test_unsent_request_is_retried_on_a_new_connection(self, is_connection_dropped):
+        stale = mock.Mock(sock=mock.Mock())
+        stale.request.side_effect = BrokenPipeError
+        client = self.get_client(stale)
+        fresh = mock.Mock(sock=None)
+        fresh.getresponse.return_value = mock.Mock(
+            status=200, will_close=False, **{'read.return_value': b'{}', 'getheaders.return_value': []}
+        )
+
+        with mock.patch('aldryn_forms.http.HTTPConnection', return_value=fresh):
+            response = client.request('POST', 'http://example.com/', b'{}')
+
+        self.assertTrue(response.ok)
+        fresh.request.assert_called_once()
+
+    def test_sent_request_is_not_retried(self, is_connection_dropped):
+        connection = mock.Mock(sock=mock.Mock())
+        connection.getresponse.side_effect = RemoteDisconnected
+        client = self.get_client(connection)
+
+        with mock.patch('aldryn_forms.http.HTTPConnection') as connection_class:
+            self.assertRaises(RemoteDisconnected, client.request, 'POST', 'http://example.com/', b'{}')
+
+        connection.request.assert_called_once()
+        connection_class.assert_not_called()
+
+
+class IsConnectionDroppedTestCase(SimpleTestCase):
+
+    def get_connection(self):
+        client_sock, server_sock = socket.socketpair()
+        self.addCleanup(client_sock.close)
+        self.addCleanup(server_sock.close)
+        return mock.Mock(sock=client_sock), server_sock
+
+    def test_closed_connection_is_dropped(self):
+        connection, server_sock = self.get_connection()
+        self.assertFalse(is_connection_dropped(connection))
+
+        server_sock.close()
+        self.assertTrue(is_connection_dropped(connection))
+
+    @unittest.skipUnless(resource.getrlimit(resource.RLIMIT_NOFILE)[0] > 2048, 'needs more than 2048 open files')
+    def test_high_file_descriptors_are_supported(self):
+        connection, server_sock = self.get_connection()
+        # past FD_SETSIZE, which select.select can't handle
+        fd = os.dup2(connection.sock.fileno(), 2000)
+        connection.sock = socket.socket(fileno=fd)
+        self.addCleanup(connection.sock.close)
+        self.assertFalse(is_connection_dropped(connection))
+
+        server_sock.close()
+        self.assertTrue(is_connection_dropped(connection))
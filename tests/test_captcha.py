@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+from unittest import mock
+
+from django import forms
+from django.test import SimpleTestCase
+
+from aldryn_forms.captcha import HTTPCaptchaVerifier, get_captcha_field_class
+from aldryn_forms.http import Response
+
+
+class HTTPCaptchaVerifierTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.verifier = HTTPCaptchaVerifier()
+        self.verifier.client = mock.Mock()
+
+    def test_reused_tokens_are_verified_again(self):
+        self.verifier.client.post_form.side_effect = [
+            Response(200, {}, b'{"success": true}'),
+            Response(200, {}, b'{"success": false, "error-codes": ["timeout-or-duplicate"]}'),
+        ]
+
+        self.assertTrue(self.verifier.verify('turnstile', 'token'))
+        self.assertFalse(self.verifier.verify('turnstile', 'token'))
+        self.assertEquals(self.verifier.client.post_form.call_count, 2)
+
+    def test_low_scores_are_rejected(self):
+        self.verifier.client.post_form.return_value = Response(200, {}, b'{"success": true, "score": 0.1}')
+
+        self.assertFalse(self.verifier.verify('recaptcha', 'token'))
+
+    def test_failing_verification_rejects(self):
+        self.verifier.client.post_form.side_effect = OSError('timed out')
+
+        self.assertFalse(self.verifier.verify('recaptcha', 'token'))
+
+
+class CaptchaFieldClassTestCase(SimpleTestCase):
+
+    @mock.patch('aldryn_forms.captcha.CAPTCHA_VERIFIER', 'aldryn_forms.captcha.LocalCaptchaVerifier')
+    def test_field_verifies_with_configured_verifier(self):
+        field = get_captcha_field_class(forms.CharField, 'recaptcha')()
+
+        self.assertEquals(field.clean('token'), 'token')
+        self.assertRaises(forms.ValidationError, field.clean, 'invalid')
+
+    def test_field_is_unchanged_without_verifier(self):
+        self.assertIs(get_captcha_field_class(forms.CharField, 'recaptcha'), forms.CharField)
@@ -1,8 +1,23 @@
+import re
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
+
 from cms.api import add_plugin, create_page
+from cms.models import Placeholder
 from cms.test_utils.testcases import CMSTestCase
 from django.core import mail
 from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, SimpleTestCase
+from django.utils import translation
+from django.utils.translation import gettext
+from filer.models import Folder
 
+from aldryn_forms.cms_plugins import FormPlugin
+from aldryn_forms.contrib.email_notifications.cms_plugins import EmailNotificationForm
+from aldryn_forms.filters import FillTimeFilter, HoneypotFilter
 from aldryn_forms.models import FormSubmission
 
 
@@ -106,3 +121,160 @@ class EmailNotificationFormPluginTestCase(CMSTestCase):
         self.assertEquals(response.status_code, 200)
         self.assertEquals(FormSubmission.objects.count(), 0)
         self.assertEquals(len(mail.outbox), 0)
+
+    def test_form_submission_with_submission_filters(self):
+        self.form_plugin.action_backend = 'default'
+        self.form_plugin.save()
+        self.page.publish('en')
+        fill_time = FillTimeFilter()
+        fill_time.min_fill_time = -1
+
+        with mock.patch('aldryn_forms.filters._filters', [HoneypotFilter(), fill_time]):
+            content = self.client.get(self.page.get_absolute_url('en')).content.decode('utf-8')
+            form_plugin_id = re.search(r'name="form_plugin_id" value="(\d+)"', content).group(1)
+            rendered = re.search(r'name="aldryn_forms_rendered" value="([^"]+)"', content).group(1)
+
+            self.assertIn('name="{}"'.format(HoneypotFilter.field_name), content)
+
+            # without the rendered field the submission is dropped
+            self.client.post(self.page.get_absolute_url('en'), {'form_plugin_id': form_plugin_id})
+            self.assertEquals(FormSubmission.objects.count(), 0)
+
+            response = self.client.post(self.page.get_absolute_url('en'), {
+                'form_plugin_id': form_plugin_id,
+                'aldryn_forms_rendered': rendered,
+            })
+
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(FormSubmission.objects.count(), 1)
+        self.assertEquals(len(mail.outbox), 1)
+
+
+class FileFieldDeduplicationTestCase(CMSTestCase):
+
+    def setUp(self):
+        super(FileFieldDeduplicationTestCase, self).setUp()
+        placeholder = Placeholder.objects.create(slot='test')
+        self.form_plugin = add_plugin(placeholder, 'FormPlugin', 'en', action_backend='default')
+        self.field = add_plugin(
+            placeholder, 'FileField', 'en', target=self.form_plugin,
+            name='upload', upload_to=Folder.objects.create(name='uploads'),
+        )
+
+    @mock.patch('aldryn_forms.cms_plugins.DEDUPLICATE_UPLOADS', True)
+    def store(self, name):
+        form = SimpleNamespace(
+            form_plugin=self.form_plugin,
+            cleaned_data={'upload': SimpleUploadedFile(name, b'same content')},
+            stored_uploads=[],
+        )
+        plugin = self.field.get_plugin_class_instance()
+        plugin.form_pre_save(instance=self.field, form=form, request=RequestFactory().get('/'))
+        return form.cleaned_data['upload']
+
+    def test_same_file_under_same_name_is_reused(self):
+        self.assertEquals(self.store('cv.txt').pk, self.store('cv.txt').pk)
+
+    def test_same_file_under_another_name_is_stored_again(self):
+        first = self.store('cv.txt')
+        second = self.store('resume.txt')
+
+        self.assertNotEquals(first.pk, second.pk)
+        self.assertEquals(second.original_filename, 'resume.txt')
+
+
+class DiscardUploadsTestCase(CMSTestCase):
+
+    def setUp(self):
+        super(DiscardUploadsTestCase, self).setUp()
+        self.plugin = FormPlugin()
+        self.instance = mock.Mock(pk=1, error_message='')
+        self.stored_file = mock.Mock()
+        self.form = mock.Mock(errors={}, submission_outcome=None)
+        self.form.is_valid.return_value = True
+        self.form.stored_uploads = [self.stored_file]
+
+    def process(self, form_valid):
+        request = RequestFactory().post('/', {'form_plugin_id': '1'})
+
+        with mock.patch.multiple(
+            self.plugin,
+            get_bound_form=mock.Mock(return_value=self.form),
+            run_pre_save_hooks=mock.Mock(),
+            run_post_save_hooks=mock.Mock(),
+            form_valid=mock.Mock(side_effect=form_valid),
+            get_form_success_url=mock.Mock(return_value=None),
+        ):
+            return self.plugin.process_submission(self.instance, request)
+
+    def test_uploads_are_removed_when_the_backend_adds_errors(self):
+        def reject(instance, request, form):
+            form.errors['__all__'] = ['The CRM is down.']
+
+        self.process(reject)
+
+        self.stored_file.delete.assert_called_once_with()
+        self.assertEquals(self.form.stored_uploads, [])
+
+    def test_uploads_are_kept_for_successful_submissions(self):
+        self.process(lambda instance, request, form: None)
+
+        self.stored_file.delete.assert_not_called()
+
+
+class RenderEmailsTestCase(SimpleTestCase):
+
+    def get_renderer(self, index):
+        def render():
+            # the first renderers finish last
+            time.sleep((5 - index) * 0.01)
+            return {
+                'index': index,
+                'language': translation.get_language(),
+                'required': gettext('This field is required.'),
+                'thread': threading.get_ident(),
+            }
+        return render
+
+    @mock.patch('aldryn_forms.contrib.email_notifications.cms_plugins.NOTIFICATION_RENDER_WORKERS', 4)
+    def test_emails_rendered_on_workers_keep_order_and_language(self):
+        form = SimpleNamespace(form_plugin=mock.Mock())
+        renderers = [self.get_renderer(index) for index in range(5)]
+
+        with translation.override('de'):
+            required = gettext('This field is required.')
+            emails = EmailNotificationForm().render_emails(form, renderers)
+
+        self.assertNotEquals(required, 'This field is required.')
+        self.assertEquals([email['index'] for email in emails], list(range(5)))
+        self.assertEquals({email['language'] for email in emails}, {'de'})
+        self.assertEquals({email['required'] for email in emails}, {required})
+        self.assertNotIn(threading.get_ident(), {email['thread'] for email in emails})
+
+
+@mock.patch('aldryn_forms.cms_plugins.CACHE_RENDER_TEMPLATES', True)
+@mock.patch.dict('aldryn_forms.cms_plugins._render_templates', clear=True)
+class RenderTemplateTestCase(CMSTestCase):
+
+    def setUp(self):
+        super(RenderTemplateTestCase, self).setUp()
+        placeholder = Placeholder.objects.create(slot='test')
+        self.form_plugin = add_plugin(placeholder, 'FormPlugin', 'en', form_template='aldryn_forms/form.html')
+
+    def get_template_name(self):
+        self.form_plugin.refresh_from_db()
+        instance, plugin = self.form_plugin.get_plugin_instance()
+        return plugin.get_render_template({}, instance, None).template.name
+
+    def set_form_template(self, form_template):
+        self.form_plugin.form_template = form_template
+        self.form_plugin.save()
+
+    def test_changed_form_template_is_picked_up(self):
+        self.assertEquals(self.get_template_name(), 'aldryn_forms/form.html')
+
+        self.set_form_template('aldryn_forms/fieldset.html')
+        self.assertEquals(self.get_template_name(), 'aldryn_forms/fieldset.html')
+
+        self.set_form_template('form.html')
+        self.assertEquals(self.get_template_name(), 'aldryn_forms/form.html')
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from unittest import mock
+
+from django.db.models.query import QuerySet
+from django.test import TestCase
+
+from aldryn_forms.models import FieldCounter
+
+
+class FieldCounterTestCase(TestCase):
+
+    def setUp(self):
+        FieldCounter._blocks.clear()
+
+    def test_first_value_starts_from_seed(self):
+        self.assertEquals(FieldCounter.increment('form-1'), 1)
+        self.assertEquals(FieldCounter.increment('form-2', seed=lambda: 41), 42)
+
+    def test_consecutive_values(self):
+        values = [FieldCounter.increment('form-1') for i in range(3)]
+
+        self.assertEquals(values, [1, 2, 3])
+        self.assertEquals(FieldCounter.objects.get(key='form-1').value, 3)
+
+    def test_concurrently_created_counter_is_incremented(self):
+        # the counter shows up between our update and our insert.
+        FieldCounter.objects.create(key='form-1', value=10)
+        update = QuerySet.update
+        calls = []
+
+        def lose_first_update(queryset, **kwargs):
+            calls.append(kwargs)
+            return 0 if len(calls) == 1 else update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', autospec=True, side_effect=lose_first_update):
+            self.assertEquals(FieldCounter.increment('form-1'), 11)
+        self.assertEquals(len(calls), 2)
+
+    @mock.patch('aldryn_forms.models.COUNTER_BLOCK_SIZE', 5)
+    def test_values_are_handed_out_from_blocks(self):
+        values = [FieldCounter.next_value('form-1') for i in range(7)]
+
+        self.assertEquals(values, [1, 2, 3, 4, 5, 6, 7])
+        self.assertEquals(FieldCounter.objects.get(key='form-1').value, 10)
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import RequestFactory, SimpleTestCase
+
+from aldryn_forms.filters import (
+    FillTimeFilter,
+    HoneypotFilter,
+    RateLimitFilter,
+    SubmissionRejected,
+    TokenBucketFilter,
+    WindowCounter,
+)
+
+
+class SubmissionFilterTestCase(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.instance = mock.Mock(pk=1)
+
+    def test_honeypot_rejects_filled_in_field(self):
+        honeypot = HoneypotFilter()
+        request = self.factory.post('/', {honeypot.field_name: 'http://spam.example.com'})
+
+        self.assertRaises(SubmissionRejected, honeypot.check, self.instance, request)
+        honeypot.check(self.instance, self.factory.post('/', {honeypot.field_name: ''}))
+
+    def test_fill_time_rejects_fast_and_unsigned_submissions(self):
+        fill_time = FillTimeFilter()
+        value = fill_time.get_value()
+
+        with self.assertRaises(SubmissionRejected):
+            fill_time.check(self.instance, self.factory.post('/', {fill_time.field_name: value}))
+
+        with self.assertRaises(SubmissionRejected):
+            fill_time.check(self.instance, self.factory.post('/', {fill_time.field_name: 'form:x:y'}))
+
+        fill_time.min_fill_time = -1
+        fill_time.check(self.instance, self.factory.post('/', {fill_time.field_name: value}))
+
+    def test_token_bucket_sheds_bursts(self):
+        bucket = TokenBucketFilter()
+        bucket.bucket_size = 2
+        request = self.factory.post('/')
+
+        bucket.check(self.instance, request)
+        bucket.check(self.instance, request)
+
+        with self.assertRaises(SubmissionRejected) as context:
+            bucket.check(self.instance, request)
+        self.assertEquals(context.exception.status, 429)
+
+    def test_rate_limit_is_per_client(self):
+        rate_limit = RateLimitFilter({'ip': (2, 60)})
+
+        for i in range(2):
+            rate_limit.check(self.instance, self.factory.post('/'))
+
+        with self.assertRaises(SubmissionRejected) as context:
+            rate_limit.check(self.instance, self.factory.post('/'))
+        self.assertEquals(context.exception.status, 429)
+
+        rate_limit.check(self.instance, self.factory.post('/', REMOTE_ADDR='10.0.0.2'))
+
+    @mock.patch('aldryn_forms.filters.cache')
+    def test_rate_limit_counts_locally_without_cache(self, mocked_cache):
+        mocked_cache.incr.side_effect = ValueError
+        mocked_cache.get.side_effect = ValueError
+        rate_limit = RateLimitFilter({'form': (1, 60)})
+        instance = mock.Mock(pk=2)
+
+        rate_limit.check(instance, self.factory.post('/'))
+        self.assertRaises(SubmissionRejected, rate_limit.check, instance, self.factory.post('/'))
+
+    @mock.patch('aldryn_forms.filters.cache')
+    def test_window_counted_locally_is_read_locally(self, mocked_cache):
+        # a cache without atomic increments still answers reads
+        mocked_cache.incr.side_effect = ValueError
+        mocked_cache.get.return_value = 100
+        counter = WindowCounter()
+
+        counter.incr('window', 60)
+
+        self.assertEquals(counter.get('window'), 1)
+        self.assertEquals(counter.get('other-window'), 100)
+
+    def test_unknown_rate_limit_scope_is_rejected(self):
+        self.assertRaises(ImproperlyConfigured, RateLimitFilter, {'user': (1, 60)})
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+from io import BytesIO
+from types import SimpleNamespace
+from unittest import mock
+
+from django import forms
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, SimpleTestCase
+
+from PIL import Image
+
+from aldryn_forms.forms import (
+    FormSubmissionBaseForm,
+    RestrictedFileField,
+    RestrictedImageField,
+    VALIDATION_NETWORK,
+)
+
+
+class ValidationOrderTestCase(SimpleTestCase):
+
+    def get_form(self, data):
+        captcha = forms.CharField()
+        captcha.validate = mock.Mock()
+        captcha._plugin_instance = SimpleNamespace(validation_cost=VALIDATION_NETWORK)
+
+        form_class = type('TestForm', (FormSubmissionBaseForm,), {
+            'captcha': captcha,
+            'name': forms.CharField(),
+        })
+        form_plugin = SimpleNamespace(pk=1, name='test', language='en')
+        data = dict(data, language='en', form_plugin_id=1)
+        return form_class(data=data, form_plugin=form_plugin, request=RequestFactory().post('/'))
+
+    def test_costly_fields_are_skipped_when_cheap_fields_fail(self):
+        form = self.get_form({'captcha': 'token'})
+
+        self.assertFalse(form.is_valid())
+        self.assertIn('name', form.errors)
+        self.assertFalse(form.fields['captcha'].validate.called)
+
+    def test_costly_fields_are_validated_last(self):
+        form = self.get_form({'captcha': 'token', 'name': 'name'})
+
+        self.assertTrue(form.is_valid())
+        self.assertTrue(form.fields['captcha'].validate.called)
+        self.assertEquals(list(form.fields), ['language', 'form_plugin_id', 'submission_key', 'captcha', 'name'])
+
+
+class RestrictedImageFieldTestCase(SimpleTestCase):
+
+    def get_image_content(self):
+        content = BytesIO()
+        Image.new('RGB', (30, 20)).save(content, format='PNG')
+        return content.getvalue()
+
+    def test_valid_image_is_accepted(self):
+        uploaded_file = SimpleUploadedFile('image.png', self.get_image_content())
+
+        self.assertEquals(RestrictedImageField(max_width=50).clean(uploaded_file), uploaded_file)
+
+    def test_truncated_image_is_rejected(self):
+        uploaded_file = SimpleUploadedFile('image.png', self.get_image_content()[:-20])
+
+        self.assertRaises(forms.ValidationError, RestrictedImageField().clean, uploaded_file)
+
+    @mock.patch('PIL.Image.MAX_IMAGE_PIXELS', 100)
+    def test_decompression_bombs_are_rejected(self):
+        for field in (RestrictedImageField(), RestrictedFileField()):
+            uploaded_file = SimpleUploadedFile('image.png', self.get_image_content())
+
+            with self.assertRaises(forms.ValidationError) as context:
+                field.clean(uploaded_file)
+            self.assertEquals(context.exception.code, 'decompression_bomb')
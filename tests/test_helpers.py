@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+from io import BytesIO
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase
+
+from PIL import Image
+
+from aldryn_forms.helpers import inspect_upload
+
+
+class InspectUploadTestCase(SimpleTestCase):
+
+    def get_image_file(self):
+        content = BytesIO()
+        Image.new('RGB', (30, 20)).save(content, format='PNG')
+        return SimpleUploadedFile('image.png', content.getvalue())
+
+    def test_image_header_is_read(self):
+        info = inspect_upload(self.get_image_file())
+
+        self.assertTrue(info.is_image)
+        self.assertEquals(info.format, 'PNG')
+        self.assertEquals(info.size, (30, 20))
+
+    def test_other_files_are_not_images(self):
+        info = inspect_upload(SimpleUploadedFile('notes.txt', b'not an image'))
+
+        self.assertFalse(info.is_image)
+
+    def test_result_is_kept_on_the_file(self):
+        uploaded_file = self.get_image_file()
+
+        self.assertIs(inspect_upload(uploaded_file), inspect_upload(uploaded_file))
+        self.assertEquals(uploaded_file.tell(), 0)
+
+    @mock.patch('PIL.Image.MAX_IMAGE_PIXELS', 100)
+    def test_decompression_bombs_are_not_swallowed(self):
+        uploaded_file = self.get_image_file()
+
+        self.assertRaises(Image.DecompressionBombError, inspect_upload, uploaded_file)
+        self.assertEquals(uploaded_file.tell(), 0)
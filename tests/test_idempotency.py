@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase
+
+from aldryn_forms.idempotency import (
+    STATUS_DONE,
+    STATUS_PENDING,
+    claim_submission,
+    new_submission_key,
+    record_submission,
+    release_submission,
+)
+
+
+@mock.patch('aldryn_forms.idempotency.SUBMISSION_KEY_TIMEOUT', 600)
+class SubmissionKeyTestCase(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.instance = mock.Mock(pk=1)
+        self.request = RequestFactory().post('/', {'submission_key': new_submission_key()})
+
+    def test_first_submission_is_processed(self):
+        self.assertIsNone(claim_submission(self.instance, self.request))
+
+    def test_repeats_get_the_recorded_outcome(self):
+        claim_submission(self.instance, self.request)
+
+        self.assertEquals(claim_submission(self.instance, self.request)['status'], STATUS_PENDING)
+
+        record_submission(self.instance, self.request, '/thanks/')
+        outcome = claim_submission(self.instance, self.request)
+
+        self.assertEquals(outcome, {'status': STATUS_DONE, 'success_url': '/thanks/'})
+
+    def test_released_submissions_can_be_sent_again(self):
+        claim_submission(self.instance, self.request)
+        release_submission(self.instance, self.request)
+
+        self.assertIsNone(claim_submission(self.instance, self.request))
+
+    def test_key_sent_with_other_data_is_another_submission(self):
+        claim_submission(self.instance, self.request)
+        request = RequestFactory().post('/', {
+            'submission_key': self.request.POST['submission_key'],
+            'name': 'Jane',
+        })
+
+        self.assertIsNone(claim_submission(self.instance, request))
+
+    def test_keys_are_ignored_without_a_timeout(self):
+        with mock.patch('aldryn_forms.idempotency.SUBMISSION_KEY_TIMEOUT', 0):
+            claim_submission(self.instance, self.request)
+
+            self.assertIsNone(claim_submission(self.instance, self.request))
+
+    def test_invalid_keys_are_ignored(self):
+        request = RequestFactory().post('/', {'submission_key': 'x' * 32})
+
+        self.assertIsNone(claim_submission(self.instance, request))
+        self.assertIsNone(claim_submission(self.instance, request))
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import socket
+import threading
+import time
+from unittest import mock
+
+from django.test import RequestFactory, SimpleTestCase
+
+from aldryn_forms.instrumentation import StatsdEmitter, SubmissionTimer, get_timer
+from aldryn_forms.signals import form_submission_timed
+
+
+class SubmissionTimerTestCase(SimpleTestCase):
+
+    def test_record_is_sent_once_with_phases(self):
+        request = RequestFactory().post('/')
+        instance = mock.Mock(pk=1)
+        receiver = mock.Mock()
+        form_submission_timed.connect(receiver)
+        self.addCleanup(form_submission_timed.disconnect, receiver)
+
+        timer = get_timer(request)
+
+        with timer.phase('notifications'):
+            with get_timer(request).phase('notifications'):
+                pass
+
+        with timer.phase('validation'):
+            pass
+
+        timer.finish(instance, request)
+        timer.finish(instance, request)
+
+        receiver.assert_called_once()
+        record = receiver.call_args[1]['record']
+        self.assertEquals(sorted(record['phases']), ['notifications', 'validation'])
+        self.assertFalse(record['valid'])
+
+    def test_same_phase_on_other_threads_is_counted(self):
+        timer = SubmissionTimer()
+        barrier = threading.Barrier(2)
+
+        def run_backend():
+            with timer.phase('backends'):
+                # both threads are in the phase at once
+                barrier.wait()
+                time.sleep(0.05)
+
+        threads = [threading.Thread(target=run_backend) for i in range(2)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertGreaterEqual(timer.phases['backends'], 0.1)
+
+    def test_statsd_emitter_sends_timers(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        server.bind(('127.0.0.1', 0))
+        server.settimeout(1)
+        self.addCleanup(server.close)
+        emitter = StatsdEmitter('127.0.0.1:%s' % server.getsockname()[1], prefix='forms')
+
+        emitter(sender=None, record={'total': 0.5, 'phases': {'validation': 0.1}})
+
+        self.assertEquals(
+            server.recv(1024).decode('utf-8').splitlines(),
+            ['forms.submission.total:500.000|ms', 'forms.submission.validation:100.000|ms'],
+        )
@@ -0,0 +1,98 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from aldryn_forms.contrib.email_notifications.mandrill import (
+    LocmemMandrillTransport,
+    build_batches,
+    get_delivered_recipients,
+    send_batched_mail,
+)
+
+
+def make_message(email, subject='New submission', **kwargs):
+    message = {
+        'subject': subject,
+        'from_email': 'forms@example.com',
+        'to': [{'email': email, 'name': ''}],
+        'global_merge_vars': [{'name': 'recipient', 'content': email}],
+    }
+    message.update(kwargs)
+    return message
+
+
+class BuildBatchesTestCase(SimpleTestCase):
+    def test_messages_sharing_content_are_batched(self):
+        batches = build_batches([
+            make_message('one@example.com'),
+            make_message('two@example.com'),
+        ])
+
+        self.assertEquals(len(batches), 1)
+        self.assertEquals(
+            [rcpt['email'] for rcpt in batches[0]['to']],
+            ['one@example.com', 'two@example.com'],
+        )
+        self.assertEquals(batches[0]['merge_vars'][1], {
+            'rcpt': 'two@example.com',
+            'vars': [{'name': 'recipient', 'content': 'two@example.com'}],
+        })
+        self.assertFalse(batches[0]['preserve_recipients'])
+
+    def test_messages_with_different_content_are_not_batched(self):
+        batches = build_batches([
+            make_message('one@example.com'),
+            make_message('two@example.com', subject='Copy'),
+        ])
+
+        self.assertEquals(len(batches), 2)
+
+    def test_recipient_is_only_part_of_a_batch_once(self):
+        batches = build_batches([
+            make_message('one@example.com'),
+            make_message('one@example.com'),
+        ])
+
+        self.assertEquals(len(batches), 2)
+
+
+class LocmemMandrillTransportTestCase(SimpleTestCase):
+    def test_send_batch(self):
+        transport = LocmemMandrillTransport()
+        batch = build_batches([make_message('one@example.com')])[0]
+
+        results = transport.send_batch('default', batch)
+
+        self.assertEquals(results, [{'email': 'one@example.com', 'status': 'sent'}])
+        self.assertEquals(transport.outbox[-1], ('default', batch))
+
+    def test_outbox_is_per_transport(self):
+        transport = LocmemMandrillTransport()
+        transport.send_batch('default', build_batches([make_message('one@example.com')])[0])
+
+        self.assertEquals(LocmemMandrillTransport().outbox, [])
+
+
+class DeliveredRecipientsTestCase(SimpleTestCase):
+    def test_rejected_and_invalid_recipients_are_dropped(self):
+        transport = mock.Mock()
+        transport.send_batch.return_value = [
+            {'email': 'one@example.com', 'status': 'sent'},
+            {'email': 'two@example.com', 'status': 'rejected'},
+            {'email': 'three@example.com', 'status': 'invalid'},
+            {'email': 'four@example.com', 'status': 'queued'},
+        ]
+        recipients = [
+            ('', 'one@example.com'),
+            ('Two', 'two@example.com'),
+            ('', 'three@example.com'),
+            ('Four', 'Four@example.com'),
+        ]
+
+        with mock.patch('aldryn_forms.contrib.email_notifications.mandrill.get_transport', return_value=transport):
+            results = send_batched_mail([make_message('one@example.com')], 'default')
+
+        self.assertEquals(
+            get_delivered_recipients(recipients, results),
+            [('', 'one@example.com'), ('Four', 'Four@example.com')],
+        )
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from aldryn_forms.middleware import (
+    FormCacheMiddleware,
+    get_block_markers,
+    get_marker,
+    replace_markers,
+)
+
+
+class FormCacheMiddlewareTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_get_marker_is_replaced_with_escaped_query_value(self):
+        request = self.factory.get('/', {'source': '"><b>'})
+        content = '<input value="%s">' % get_marker('get', 'source', 'default')
+
+        self.assertEquals(
+            replace_markers(request, content),
+            '<input value="&quot;&gt;&lt;b&gt;">',
+        )
+
+    def test_get_marker_falls_back_to_default(self):
+        request = self.factory.get('/')
+        content = '<input value="%s">' % get_marker('get', 'source', 'default')
+
+        self.assertEquals(replace_markers(request, content), '<input value="default">')
+
+    def test_localstorage_block_is_removed_without_cookie(self):
+        request = self.factory.get('/')
+        start, end = get_block_markers('localstorage')
+        content = 'a%s<script></script>%sb' % (start, end)
+
+        self.assertEquals(replace_markers(request, content), 'ab')
+
+    def test_unknown_markers_are_left_alone(self):
+        request = self.factory.get('/')
+        content = get_marker('unknown')
+
+        self.assertEquals(replace_markers(request, content), content)
+
+    def test_csrf_marker_is_replaced_in_response(self):
+        request = self.factory.get('/')
+        middleware = FormCacheMiddleware(lambda request: response)
+        response = HttpResponse('<input value="%s">' % get_marker('csrf'))
+
+        response = middleware(request)
+
+        self.assertNotIn(b'aldryn-forms', response.content)
+        self.assertTrue(request._aldryn_forms_markers)
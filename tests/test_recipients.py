@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+from cms.api import add_plugin
+from cms.models import Placeholder
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from aldryn_forms.models import FormPlugin
+
+
+class NotificationRecipientsTestCase(TestCase):
+
+    def setUp(self):
+        super(NotificationRecipientsTestCase, self).setUp()
+        cache.clear()
+        placeholder = Placeholder.objects.create(slot='test')
+        self.form_plugin = add_plugin(placeholder, 'FormPlugin', 'en', name='contact')
+        self.jane = User.objects.create(username='jane', email='jane@example.com')
+        self.john = User.objects.create(username='john', email='john@example.com')
+        self.form_plugin.recipients.add(self.jane)
+
+    def get_emails(self):
+        form_plugin = FormPlugin.objects.get(pk=self.form_plugin.pk)
+        return sorted(email for name, email in form_plugin.get_notification_recipients())
+
+    def test_recipients_are_cached(self):
+        self.assertEquals(self.get_emails(), ['jane@example.com'])
+
+        with self.assertNumQueries(1):
+            # only the form itself is loaded
+            self.assertEquals(self.get_emails(), ['jane@example.com'])
+
+    def test_added_recipients_show_up(self):
+        self.assertEquals(self.get_emails(), ['jane@example.com'])
+
+        self.form_plugin.recipients.add(self.john)
+        self.assertEquals(self.get_emails(), ['jane@example.com', 'john@example.com'])
+
+        # from the user's side too
+        self.form_plugin.recipients.remove(self.john)
+        self.assertEquals(self.get_emails(), ['jane@example.com'])
+        self.john.formplugin_set.add(self.form_plugin)
+        self.assertEquals(self.get_emails(), ['jane@example.com', 'john@example.com'])
+
+    def test_removed_recipients_are_dropped(self):
+        self.form_plugin.recipients.add(self.john)
+        self.assertEquals(self.get_emails(), ['jane@example.com', 'john@example.com'])
+
+        self.form_plugin.recipients.remove(self.jane)
+        self.assertEquals(self.get_emails(), ['john@example.com'])
+
+        self.form_plugin.recipients.clear()
+        self.assertEquals(self.get_emails(), [])
+
+    def test_changed_emails_show_up(self):
+        self.assertEquals(self.get_emails(), ['jane@example.com'])
+
+        self.jane.email = 'jane.doe@example.com'
+        self.jane.save()
+        self.assertEquals(self.get_emails(), ['jane.doe@example.com'])
+
+        self.jane.email = 'jane@example.org'
+        self.jane.save(update_fields=['email'])
+        self.assertEquals(self.get_emails(), ['jane@example.org'])
+
+    def test_deleted_users_are_dropped(self):
+        self.assertEquals(self.get_emails(), ['jane@example.com'])
+
+        self.jane.delete()
+        self.assertEquals(self.get_emails(), [])
@@ -0,0 +1,36 @@
+from collections import namedtuple
+
+from django.test import SimpleTestCase
+
+from aldryn_forms.contrib.email_notifications.routing import RoutingTable
+
+
+Conditional = namedtuple(
+    'Conditional',
+    ['pk', 'field_name', 'field_value', 'action_type', 'action_value'],
+)
+
+
+class RoutingTableTestCase(SimpleTestCase):
+    def setUp(self):
+        self.table = RoutingTable.compile([
+            Conditional(1, 'country', 'CH', 'email', 'ch@example.com'),
+            Conditional(2, 'country', 'DE', 'email', 'de@example.com'),
+            Conditional(3, 'product', 'forms', 'redirect', '/thanks/forms/'),
+            Conditional(4, 'country', 'CH', 'redirect-email', 'not an email'),
+            Conditional(5, 'country', 'CH', 'redirect', '/thanks/ch/'),
+        ])
+
+    def test_invalid_recipients_are_not_routed(self):
+        routes = self.table.match({'country': 'CH'})
+
+        self.assertEquals([route[0] for route in routes], [1, 5])
+
+    def test_multiple_values_keep_creation_order(self):
+        routes = self.table.match({'country': 'DE, CH', 'product': 'forms'})
+
+        self.assertEquals([route[0] for route in routes], [1, 2, 3, 5])
+
+    def test_no_match(self):
+        self.assertEquals(self.table.match({'country': 'FR'}), [])
+        self.assertEquals(self.table.match({}), [])
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+import datetime
+from unittest import mock
+
+from django import forms
+from django.test import SimpleTestCase
+
+from aldryn_forms import schema
+
+
+class SchemaTestCase(SimpleTestCase):
+
+    def setUp(self):
+        schema._schemas.clear()
+        self.plugin = mock.Mock()
+        self.plugin.get_form_class.side_effect = lambda instance: type('Form', (forms.Form,), {})
+        self.plugin.get_request_fields.return_value = []
+
+    def get_instance(self, pk=1, children=None):
+        instance = mock.Mock(pk=pk, changed_date=datetime.datetime(2020, 1, 1))
+        values = instance.get_descendants.return_value.order_by.return_value.values_list
+        values.return_value = children or [(2, pk, 0, datetime.datetime(2020, 1, 1))]
+        return instance
+
+    def test_form_class_is_reused(self):
+        first = schema.get_form_schema(self.plugin, self.get_instance())
+        second = schema.get_form_schema(self.plugin, self.get_instance())
+
+        self.assertIs(first.form_class, second.form_class)
+        self.assertEquals(self.plugin.get_form_class.call_count, 1)
+
+    def test_reordering_children_invalidates(self):
+        changed = datetime.datetime(2020, 1, 1)
+        first = schema.get_form_schema(
+            self.plugin, self.get_instance(children=[(2, 1, 0, changed), (3, 1, 1, changed)]),
+        )
+        second = schema.get_form_schema(
+            self.plugin, self.get_instance(children=[(2, 1, 1, changed), (3, 1, 0, changed)]),
+        )
+
+        self.assertIsNot(first.form_class, second.form_class)
+
+    def test_changing_the_form_invalidates(self):
+        instance = self.get_instance()
+        first = schema.get_form_schema(self.plugin, instance)
+        instance.changed_date = datetime.datetime(2021, 1, 1)
+
+        self.assertIsNot(first.form_class, schema.get_form_schema(self.plugin, instance).form_class)
+
+    @mock.patch('aldryn_forms.schema.SCHEMA_CACHE_SIZE', 2)
+    def test_cache_is_bounded(self):
+        for pk in range(1, 5):
+            schema.get_form_schema(self.plugin, self.get_instance(pk=pk))
+
+        self.assertEquals([key[1] for key in schema._schemas], [3, 4])
+
+
+class FormSchemaTestCase(SimpleTestCase):
+
+    def get_file_field(self, max_size):
+        field = forms.FileField()
+        field.max_size = max_size
+        return field
+
+    def test_upload_total_is_the_sum_of_field_limits(self):
+        form_class = type('Form', (forms.Form,), {
+            'cv': self.get_file_field(100),
+            'photo': self.get_file_field(200),
+            'name': forms.CharField(),
+        })
+
+        self.assertEquals(schema.FormSchema(form_class, []).upload_total_limit, 300)
+
+    def test_unlimited_field_leaves_the_total_open(self):
+        form_class = type('Form', (forms.Form,), {
+            'cv': self.get_file_field(100),
+            'photo': self.get_file_field(None),
+        })
+
+        self.assertIsNone(schema.FormSchema(form_class, []).upload_total_limit)
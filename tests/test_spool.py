@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from aldryn_forms.spool import SubmissionSpool
+
+
+@mock.patch.object(SubmissionSpool, 'start_flusher')
+class SubmissionSpoolTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.spool = SubmissionSpool(os.path.join(self.directory, 'submissions'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def get_submission(self, name):
+        return SimpleNamespace(name=name, data='[]', recipients='[]', language='en', form_url='/')
+
+    def test_appended_submissions_are_claimed_together(self, start_flusher):
+        self.spool.append(self.get_submission('one'))
+        self.spool.append(self.get_submission('two'))
+
+        claimed = self.spool.claim()
+
+        self.assertEquals(len(claimed), 1)
+        self.assertFalse(os.path.exists(self.spool.path))
+
+        with open(claimed[0]) as claimed_file:
+            records = self.spool.read(claimed_file)
+        self.assertEquals([record['name'] for record in records], ['one', 'two'])
+
+    def test_flusher_is_woken_up_after_flush_size_submissions(self, start_flusher):
+        self.spool.flush_size = 2
+        self.spool.append(self.get_submission('one'))
+
+        self.assertFalse(self.spool._wakeup.is_set())
+        self.spool.append(self.get_submission('two'))
+        self.assertTrue(self.spool._wakeup.is_set())
+
+    def test_spooled_submissions_are_only_synced_with_fsync(self, start_flusher):
+        with mock.patch('aldryn_forms.spool.os.fsync') as fsync:
+            self.spool.append(self.get_submission('one'))
+            self.assertFalse(fsync.called)
+
+            self.spool.fsync = True
+            self.spool.append(self.get_submission('two'))
+            self.assertTrue(fsync.called)
+
+
+@mock.patch.object(SubmissionSpool, 'start_flusher')
+class SubmissionSpoolFlushTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.spool = SubmissionSpool(os.path.join(self.directory, 'submissions'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_submissions_saved_before_a_crash_are_not_saved_again(self, start_flusher):
+        from aldryn_forms.models import FormSubmission
+
+        for name in ('one', 'two'):
+            submission = SimpleNamespace(name=name, data='[]', recipients='[]', language='en', form_url='/')
+            self.spool.append(submission)
+
+        claimed = self.spool.claim()[0]
+
+        with open(claimed) as claimed_file:
+            first = self.spool.read(claimed_file)[0]
+        # the flush crashed after saving, before removing the file
+        FormSubmission.objects.create(**first)
+
+        self.assertEquals(self.spool.flush(), 1)
+        self.assertEquals(
+            sorted(FormSubmission.objects.values_list('name', flat=True)),
+            ['one', 'two'],
+        )
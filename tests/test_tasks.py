@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+import json
+from datetime import timedelta
+from unittest import mock
+
+from cms.api import add_plugin, create_page
+from cms.test_utils.testcases import CMSTestCase
+from django.core.management import call_command
+from django.utils import timezone
+
+from aldryn_forms.action_backends import NoAction
+from aldryn_forms.models import FormPlugin, SubmissionTask
+from aldryn_forms.tasks import TASK_LEASE, claim_tasks, process_tasks, run_task
+
+
+class FailingAction(NoAction):
+
+    def form_valid(self, cmsplugin, instance, request, form):
+        raise ValueError('down')
+
+
+class RejectingAction(NoAction):
+
+    def form_valid(self, cmsplugin, instance, request, form):
+        form._add_error('The CRM rejected the submission.')
+
+
+class SubmissionTaskTestCase(CMSTestCase):
+
+    def setUp(self):
+        super(SubmissionTaskTestCase, self).setUp()
+        page = create_page('test page', 'test_page.html', 'en', published=True)
+        self.placeholder = page.placeholders.get(slot='content')
+        self.form_plugin = add_plugin(
+            self.placeholder, 'FormPlugin', 'en', name='contact', action_backend='default',
+        )
+
+    def create_task(self):
+        payload = {
+            'form': {'form_url': '/', 'fields': [], 'confirmation_fields': [], 'cleaned_data': {}},
+            'request': {'path': '/', 'scheme': 'http', 'language': 'en', 'meta': {}},
+        }
+        task = SubmissionTask(payload=json.dumps(payload))
+        task.set_form(self.form_plugin)
+        task.save()
+        return task
+
+    def use_backend(self, action_backend):
+        patcher = mock.patch(
+            'aldryn_forms.tasks.get_action_backends',
+            return_value={'default': action_backend},
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_claim_leases_due_tasks(self):
+        task = self.create_task()
+
+        claimed = claim_tasks()
+        task.refresh_from_db()
+
+        self.assertEquals(claimed, [task])
+        self.assertEquals(task.status, SubmissionTask.STATUS_RUNNING)
+        self.assertEquals(task.attempts, 1)
+        self.assertGreater(task.run_after, timezone.now() + TASK_LEASE - timedelta(minutes=1))
+        self.assertEquals(claim_tasks(), [])
+
+    def test_tasks_with_an_expired_lease_are_claimed_again(self):
+        task = self.create_task()
+        claim_tasks()
+        SubmissionTask.objects.filter(pk=task.pk).update(run_after=timezone.now() - timedelta(seconds=1))
+
+        claimed = claim_tasks()
+
+        self.assertEquals(claimed, [task])
+        self.assertEquals(claimed[0].attempts, 2)
+
+    def test_successful_tasks_are_removed(self):
+        self.use_backend(NoAction)
+        self.create_task()
+
+        self.assertEquals(process_tasks(), 1)
+        self.assertFalse(SubmissionTask.objects.exists())
+
+    def test_failed_tasks_are_retried_with_backoff(self):
+        self.use_backend(FailingAction)
+        task = self.create_task()
+
+        self.assertEquals(process_tasks(), 0)
+        task.refresh_from_db()
+
+        self.assertEquals(task.status, SubmissionTask.STATUS_PENDING)
+        self.assertIn('ValueError: down', task.last_error)
+        self.assertGreater(task.run_after, timezone.now() + timedelta(seconds=55))
+        self.assertEquals(claim_tasks(), [])
+
+    def test_form_errors_count_as_failure(self):
+        self.use_backend(RejectingAction)
+        task = self.create_task()
+
+        self.assertEquals(process_tasks(), 0)
+        task.refresh_from_db()
+
+        self.assertEquals(task.status, SubmissionTask.STATUS_PENDING)
+        self.assertIn('The CRM rejected the submission.', task.last_error)
+
+    @mock.patch('aldryn_forms.tasks.DEFERRED_ACTION_MAX_ATTEMPTS', 1)
+    def test_tasks_fail_once_out_of_attempts(self):
+        self.use_backend(FailingAction)
+        task = self.create_task()
+
+        process_tasks()
+        task.refresh_from_db()
+
+        self.assertEquals(task.status, SubmissionTask.STATUS_FAILED)
+
+    def test_task_finds_its_form_by_pk(self):
+        self.use_backend(NoAction)
+        task = self.create_task()
+        FormPlugin.objects.filter(pk=self.form_plugin.pk).update(name='renamed')
+        task.refresh_from_db()
+
+        self.assertEquals(task.get_form(), self.form_plugin)
+        self.assertTrue(run_task(task))
+
+    def test_task_ignores_other_forms_with_the_same_name(self):
+        task = self.create_task()
+        self.form_plugin.delete()
+        add_plugin(self.placeholder, 'FormPlugin', 'en', name='contact', action_backend='default')
+        task.refresh_from_db()
+
+        self.assertIsNone(task.get_form())
+
+    def test_task_fails_without_its_form(self):
+        task = self.create_task()
+        self.form_plugin.delete()
+        task.refresh_from_db()
+
+        self.assertFalse(run_task(task))
+        task.refresh_from_db()
+
+        self.assertEquals(task.status, SubmissionTask.STATUS_FAILED)
+        self.assertEquals(task.form_name, 'contact')
+
+    def test_command_processes_due_tasks(self):
+        self.use_backend(NoAction)
+        self.create_task()
+        self.create_task()
+
+        call_command('process_form_submissions', batch_size=1)
+        self.assertEquals(SubmissionTask.objects.count(), 1)
+
+        call_command('process_form_submissions')
+        self.assertFalse(SubmissionTask.objects.exists())
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import hashlib
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, SimpleTestCase
+
+from aldryn_forms.uploadhandler import get_upload_sha1, receive_upload
+
+
+class FormUploadHandlerTestCase(SimpleTestCase):
+
+    def get_request(self, size):
+        data = {
+            'name': 'value',
+            'file_upload': SimpleUploadedFile('upload.txt', b'x' * size),
+        }
+        return RequestFactory().post('/', data)
+
+    def test_files_within_limits_are_received(self):
+        request = self.get_request(size=100)
+        upload = receive_upload(request, max_sizes={'file_upload': 100})
+
+        self.assertFalse(upload.aborted)
+        self.assertEquals(request.FILES['file_upload'].size, 100)
+
+    def test_oversized_file_stops_the_upload(self):
+        request = self.get_request(size=200 * 1024)
+        upload = receive_upload(request, max_sizes={'file_upload': 1024})
+
+        self.assertTrue(upload.aborted)
+        self.assertEquals(upload.rejected_fields, {'file_upload': 1024})
+        self.assertNotIn('file_upload', request.FILES)
+        self.assertEquals(list(upload.get_errors()), ['file_upload'])
+
+    def test_form_total_stops_the_upload(self):
+        request = self.get_request(size=200 * 1024)
+        upload = receive_upload(request, max_total_size=1024)
+
+        self.assertTrue(upload.rejected_total)
+        self.assertEquals(upload.max_total_size, 1024)
+
+    @mock.patch('aldryn_forms.uploadhandler.MAX_UPLOAD_SIZE', 512)
+    def test_global_limit_caps_the_form_total(self):
+        upload = receive_upload(self.get_request(size=100), max_total_size=1024)
+
+        self.assertEquals(upload.max_total_size, 512)
+
+    @mock.patch('aldryn_forms.uploadhandler.DEDUPLICATE_UPLOADS', True)
+    def test_sha1_is_computed_while_receiving(self):
+        request = self.get_request(size=100)
+        receive_upload(request)
+
+        self.assertEquals(
+            request.FILES['file_upload'].sha1,
+            hashlib.sha1(b'x' * 100).hexdigest(),
+        )
+
+    def test_sha1_is_computed_on_demand(self):
+        uploaded_file = SimpleUploadedFile('upload.txt', b'x' * 100)
+
+        self.assertEquals(get_upload_sha1(uploaded_file), hashlib.sha1(b'x' * 100).hexdigest())
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+import json
+from unittest import mock
+
+from cms.api import add_plugin, create_page
+from cms.test_utils.testcases import CMSTestCase
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth.models import AnonymousUser, User
+from django.middleware.csrf import get_token
+from django.core.cache import cache
+from django.test import RequestFactory, TransactionTestCase
+from filer.models import Folder
+
+from aldryn_forms.idempotency import new_submission_key
+from aldryn_forms.models import FormSubmission
+from aldryn_forms.views import render_submitted_form, submit_form_async_view, submit_form_json_view
+
+
+class SubmitViewMixin(object):
+
+    def setUp(self):
+        super(SubmitViewMixin, self).setUp()
+        self.factory = RequestFactory()
+        self.page = create_page('test page', 'test_page.html', 'en', published=True)
+        self.url = self.page.get_absolute_url('en')
+        self.placeholder = self.page.placeholders.get(slot='content')
+        self.user = User.objects.create_superuser('username', 'email@example.com', 'password')
+
+        plugin_data = {
+            'redirect_type': 'redirect_to_url',
+            'url': 'http://www.google.com',
+            'action_backend': 'default',
+        }
+        self.form_plugin = add_plugin(self.placeholder, 'FormPlugin', 'en', **plugin_data)
+        self.form_plugin.recipients.add(self.user)
+
+        add_plugin(self.placeholder, 'TextField', 'en', target=self.form_plugin, name='name', required=True)
+        add_plugin(self.placeholder, 'SubmitButton', 'en', target=self.form_plugin)
+
+    def get_request(self, data, csrf=False):
+        request = self.factory.post(self.url, data)
+        request.user = AnonymousUser()
+        request.session = {}
+        request._dont_enforce_csrf_checks = not csrf
+        return request
+
+
+class SubmitViewTestCase(SubmitViewMixin, CMSTestCase):
+    pass
+
+
+class SubmitFormJSONViewTestCase(SubmitViewTestCase):
+
+    def submit(self, request, form_plugin_id=None):
+        response = submit_form_json_view(request, str(form_plugin_id or self.form_plugin.pk))
+        return response, json.loads(response.content.decode('utf-8'))
+
+    def test_invalid_submission_returns_errors(self):
+        response, data = self.submit(self.get_request({}))
+
+        self.assertEquals(response.status_code, 400)
+        self.assertFalse(data['success'])
+        self.assertIn('name', data['errors'])
+        self.assertEquals(FormSubmission.objects.count(), 0)
+
+    def test_valid_submission_returns_success_url(self):
+        response, data = self.submit(self.get_request({'name': 'Jane'}))
+
+        self.assertEquals(response.status_code, 200)
+        self.assertTrue(data['success'])
+        self.assertEquals(data['success_url'], 'http://www.google.com')
+        self.assertRegex(data['submission_key'], r'^[0-9a-f]{32}$')
+        self.assertEquals(FormSubmission.objects.count(), 1)
+
+    def test_unknown_form_returns_404(self):
+        response, data = self.submit(self.get_request({'name': 'Jane'}), form_plugin_id=999999)
+
+        self.assertEquals(response.status_code, 404)
+        self.assertFalse(data['success'])
+
+    def test_data_for_another_form_is_rejected(self):
+        request = self.get_request({'name': 'Jane', 'form_plugin_id': '999999'})
+        response = submit_form_json_view(request, str(self.form_plugin.pk))
+
+        self.assertEquals(response.status_code, 400)
+
+    def test_post_without_csrf_token_is_forbidden(self):
+        response = submit_form_json_view(self.get_request({'name': 'Jane'}, csrf=True), str(self.form_plugin.pk))
+
+        self.assertEquals(response.status_code, 403)
+        self.assertEquals(FormSubmission.objects.count(), 0)
+
+    def test_post_with_csrf_token_is_accepted(self):
+        token_request = self.factory.get('/')
+        token = get_token(token_request)
+        request = self.get_request({'name': 'Jane', 'csrfmiddlewaretoken': token}, csrf=True)
+        request.COOKIES[settings.CSRF_COOKIE_NAME] = token_request.META['CSRF_COOKIE']
+
+        response, data = self.submit(request)
+
+        self.assertEquals(response.status_code, 200)
+        self.assertTrue(data['success'])
+
+
+@mock.patch('aldryn_forms.idempotency.SUBMISSION_KEY_TIMEOUT', 600)
+class RepeatedSubmissionTestCase(SubmitViewTestCase):
+
+    def setUp(self):
+        super(RepeatedSubmissionTestCase, self).setUp()
+        cache.clear()
+        self.data = {
+            'name': 'Jane',
+            'form_plugin_id': str(self.form_plugin.pk),
+            'submission_key': new_submission_key(),
+        }
+
+    def test_repeated_post_is_saved_once(self):
+        submit_form_json_view(self.get_request(self.data), str(self.form_plugin.pk))
+        response = submit_form_json_view(self.get_request(self.data), str(self.form_plugin.pk))
+        data = json.loads(response.content.decode('utf-8'))
+
+        self.assertEquals(data['success_url'], 'http://www.google.com')
+        self.assertNotEquals(data['submission_key'], self.data['submission_key'])
+        self.assertEquals(FormSubmission.objects.count(), 1)
+
+    def test_key_sent_with_other_data_is_a_new_submission(self):
+        submit_form_json_view(self.get_request(self.data), str(self.form_plugin.pk))
+        submit_form_json_view(self.get_request(dict(self.data, name='John')), str(self.form_plugin.pk))
+
+        self.assertEquals(FormSubmission.objects.count(), 2)
+
+    def test_repeated_post_redirects_to_the_first_success_url(self):
+        render_submitted_form(self.get_request(self.data))
+        self.form_plugin.url = 'http://www.example.com'
+        self.form_plugin.save()
+
+        response = render_submitted_form(self.get_request(self.data))
+
+        self.assertEquals(response.status_code, 302)
+        self.assertEquals(response['Location'], 'http://www.google.com')
+        self.assertEquals(FormSubmission.objects.count(), 1)
+
+
+class SubmitFormAsyncViewTestCase(SubmitViewMixin, TransactionTestCase):
+    # validation and the hooks run on threads with connections of their own,
+    # which can't see the rows of a test wrapped in a transaction.
+
+    def setUp(self):
+        super(SubmitFormAsyncViewTestCase, self).setUp()
+        folder = Folder.objects.create(name='uploads')
+        add_plugin(
+            self.placeholder, 'FileField', 'en', target=self.form_plugin,
+            name='upload', upload_to=folder, max_size=100,
+        )
+
+    async def asubmit(self, request):
+        response = await submit_form_async_view(request, str(self.form_plugin.pk))
+        return response, json.loads(response.content.decode('utf-8'))
+
+    async def test_async_invalid_submission_returns_errors(self):
+        response, data = await self.asubmit(self.get_request({}))
+
+        self.assertEquals(response.status_code, 400)
+        self.assertIn('name', data['errors'])
+
+    async def test_async_valid_submission_returns_success_url(self):
+        upload = SimpleUploadedFile('cv.txt', b'small file')
+        response, data = await self.asubmit(self.get_request({'name': 'Jane', 'upload': upload}))
+
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(data['success_url'], 'http://www.google.com')
+
+    async def test_async_oversized_upload_is_cut_off(self):
+        upload = SimpleUploadedFile('cv.txt', b'x' * 1024 * 1024)
+        response, data = await self.asubmit(self.get_request({'name': 'Jane', 'upload': upload}))
+
+        self.assertEquals(response.status_code, 400)
+        self.assertEquals(data['errors']['upload'][0]['code'], 'max_size')